@@ -1,9 +1,75 @@
-from PySide6.QtWidgets import QWidget, QLabel, QPushButton, QLineEdit, QVBoxLayout, QHBoxLayout, QProgressBar, QComboBox, QCheckBox, QFileDialog, QTextEdit, QStackedWidget
-from PySide6.QtGui import QIcon, Qt, QPixmap
-from PySide6.QtCore import QTimer
-
+from PySide6.QtWidgets import QWidget, QLabel, QPushButton, QLineEdit, QVBoxLayout, QHBoxLayout, QProgressBar, QComboBox, QCheckBox, QFileDialog, QPlainTextEdit, QStackedWidget, QTableWidget, QTableWidgetItem, QSpinBox, QHeaderView, QAbstractItemView, QDialog, QListWidget, QListWidgetItem, QDialogButtonBox
+from PySide6.QtGui import QIcon, Qt, QPixmap, QDesktopServices
+from PySide6.QtCore import QTimer, QUrl
+from pathlib import Path
+
+from resources.archive import ARCHIVE_PATH
+from resources.bandwidth import NIGHT_END, NIGHT_START, parse_rate
+from resources.console import ConsoleBuffer, DEFAULT_SCROLLBACK
+from resources.core import DEFAULT_WORKERS, DEFAULT_PLAYLIST_LIMIT, EXTERNAL_DOWNLOADERS, MAX_CONCURRENT_FRAGMENTS, validate_sections, validate_transfer_options
 from resources.downloader import Downloader
+from resources.jobqueue import PROCESSING, QUEUED, RUNNING
+from resources.jobspec import CUT_MODES, JobSpec, format_command
+from resources.metrics import metrics
 from resources.notifications import PopupManager
+from resources.probe import audio_bitrates, video_containers, video_heights
+from resources.ytdlp_engine import ENGINES, IN_PROCESS, is_available as in_process_available
+
+LOG_PATH = Path(__file__).parent / "data" / "logs" / "console.log"
+JOBS_DB_PATH = Path(__file__).parent / "data" / "jobs.sqlite3"
+METRICS_PATH = Path(__file__).parent / "data" / "metrics.prom"
+CONSOLE_FLUSH_MS = 100
+VIDEO_FORMATS = ["mp4", "mkv", "mov", "avi", "flv", "webm"]
+
+class PlaylistDialog(QDialog):
+    def __init__(self, parent, title, entries):
+        super().__init__(parent)
+        self.entries = entries
+        self.setWindowTitle("Playlist")
+        self.setMinimumSize(480, 420)
+
+        layout = QVBoxLayout(self)
+        title_label = QLabel(f"{title} ({len(entries)} videos)")
+        title_label.setWordWrap(True)
+        layout.addWidget(title_label)
+
+        self.entry_list = QListWidget()
+        for entry in entries:
+            item = QListWidgetItem(entry["title"])
+            item.setToolTip(entry["url"])
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.entry_list.addItem(item)
+        layout.addWidget(self.entry_list)
+
+        select_layout = QHBoxLayout()
+        select_all_button = QPushButton("Select all")
+        select_all_button.clicked.connect(lambda: self.set_all(Qt.Checked))
+        select_none_button = QPushButton("Select none")
+        select_none_button.clicked.connect(lambda: self.set_all(Qt.Unchecked))
+        self.limit_label = QLabel("Parallel downloads:")
+        self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(1, 8)
+        self.limit_spin.setValue(DEFAULT_PLAYLIST_LIMIT)
+        select_layout.addWidget(select_all_button)
+        select_layout.addWidget(select_none_button)
+        select_layout.addStretch()
+        select_layout.addWidget(self.limit_label)
+        select_layout.addWidget(self.limit_spin)
+        layout.addLayout(select_layout)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def set_all(self, state):
+        for i in range(self.entry_list.count()):
+            self.entry_list.item(i).setCheckState(state)
+
+    def selected_entries(self):
+        return [entry for i, entry in enumerate(self.entries)
+                if self.entry_list.item(i).checkState() == Qt.Checked]
 
 class VideoDownloaderGUI(QWidget):
     def __init__(self, resource_path_func):
@@ -11,13 +77,31 @@ class VideoDownloaderGUI(QWidget):
         self.resource_path = resource_path_func
 
         self.setWindowTitle("GUI Video Downloader")
-        self.setFixedSize(550, 600)
+        self.setFixedSize(550, 640)
         self.setWindowIcon(QIcon(str(self.resource_path("icon.ico"))))
+        self.job_rows = {}
         self.init_ui()
+        self.popup = PopupManager(self)
+        self.console = ConsoleBuffer(DEFAULT_SCROLLBACK, log_path=LOG_PATH)
+        self.console_timer = QTimer(self)
+        self.console_timer.timeout.connect(self.flush_console)
+        self.console_timer.start(CONSOLE_FLUSH_MS)
+        metrics.set_path(METRICS_PATH)
+        self.downloader = Downloader(
+            self.popup,
+            progress_callback=self.update_progress,
+            console=self.console,
+            job_callback=self.update_job_row,
+            store_path=JOBS_DB_PATH,
+            archive_path=ARCHIVE_PATH
+        )
+        self.downloader.probe_signal.connect(self.on_probe_finished)
+        self.downloader.playlist_signal.connect(self.on_playlist_expanded)
+        self.connect_preview_signals()
+        self.update_command_preview()
+        QTimer.singleShot(0, self.downloader.restore_jobs)
 
     def init_ui(self):
-        icon_label = QLabel()
-        icon_label.setPixmap(QPixmap(str(self.resource_path("icon.ico"))).scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation))
         main_layout = QVBoxLayout()
 
         title_layout = QHBoxLayout()
@@ -43,8 +127,13 @@ class VideoDownloaderGUI(QWidget):
         self.url_label = QLabel("Video URL:")
         self.url_input = QLineEdit()
         self.url_input.setPlaceholderText("Paste your video URL here")
+        self.probe_button = QPushButton("Check formats")
+        self.probe_button.clicked.connect(self.probe_url)
+        url_layout = QHBoxLayout()
+        url_layout.addWidget(self.url_input)
+        url_layout.addWidget(self.probe_button)
         download_layout.addWidget(self.url_label)
-        download_layout.addWidget(self.url_input)
+        download_layout.addLayout(url_layout)
 
         self.path_label = QLabel("Download path:")
         path_layout = QHBoxLayout()
@@ -60,8 +149,17 @@ class VideoDownloaderGUI(QWidget):
         self.cookies_label = QLabel("Cookies from browser:")
         self.cookies_combo = QComboBox()
         self.cookies_combo.addItems(["None", "Brave", "Chrome", "Chromium", "Edge", "Firefox", "Opera", "Safari", "Vivaldi", "Whale"])
+        self.engine_label = QLabel("Engine:")
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(ENGINES)
+        if not in_process_available():
+            self.engine_combo.model().item(ENGINES.index(IN_PROCESS)).setEnabled(False)
+        cookies_layout = QHBoxLayout()
+        cookies_layout.addWidget(self.cookies_combo, stretch=1)
+        cookies_layout.addWidget(self.engine_label)
+        cookies_layout.addWidget(self.engine_combo)
         download_layout.addWidget(self.cookies_label)
-        download_layout.addWidget(self.cookies_combo)
+        download_layout.addLayout(cookies_layout)
 
         self.frag_label = QLabel("Download fragments:")
         frag_layout = QHBoxLayout()
@@ -69,14 +167,29 @@ class VideoDownloaderGUI(QWidget):
         self.frag_from.setPlaceholderText("From (hh:mm:ss)")
         self.frag_to = QLineEdit()
         self.frag_to.setPlaceholderText("To (hh:mm:ss)")
+        self.sections_input = QLineEdit()
+        self.sections_input.setPlaceholderText("More ranges: 1:00-1:30, 5:00-5:20")
+        self.cut_mode_combo = QComboBox()
+        self.cut_mode_combo.addItems(CUT_MODES)
+        self.cut_mode_combo.setToolTip("fast: cut at keyframes without re-encoding\nexact: re-encode for frame-accurate cuts")
         frag_layout.addWidget(self.frag_from)
         frag_layout.addWidget(self.frag_to)
+        frag_layout.addWidget(self.sections_input)
+        frag_layout.addWidget(self.cut_mode_combo)
         download_layout.addWidget(self.frag_label)
         download_layout.addLayout(frag_layout)
 
         self.audio_only_checkbox = QCheckBox("Audio only")
         self.audio_only_checkbox.stateChanged.connect(self.toggle_audio_only)
-        download_layout.addWidget(self.audio_only_checkbox)
+        self.playlist_checkbox = QCheckBox("Whole playlist")
+        self.skip_archived_checkbox = QCheckBox("Skip downloaded")
+        self.skip_archived_checkbox.setChecked(True)
+        checkbox_layout = QHBoxLayout()
+        checkbox_layout.addWidget(self.audio_only_checkbox)
+        checkbox_layout.addWidget(self.playlist_checkbox)
+        checkbox_layout.addWidget(self.skip_archived_checkbox)
+        checkbox_layout.addStretch()
+        download_layout.addLayout(checkbox_layout)
 
         video_layout = QHBoxLayout()
         self.video_quality_label = QLabel("Video quality:")
@@ -86,7 +199,7 @@ class VideoDownloaderGUI(QWidget):
         self.video_format_label = QLabel("Video format:")
         self.video_format_combo = QComboBox()
         self.video_format_combo.setMinimumWidth(100)
-        self.video_format_combo.addItems(["Default", "mp4", "mkv", "mov", "avi", "flv", "webm"])
+        self.video_format_combo.addItems(["Default"] + VIDEO_FORMATS)
         video_layout.addWidget(self.video_quality_label)
         video_layout.addWidget(self.video_quality_combo)
         video_layout.addWidget(self.video_format_label)
@@ -108,6 +221,26 @@ class VideoDownloaderGUI(QWidget):
         audio_layout.addWidget(self.audio_format_combo)
         download_layout.addLayout(audio_layout)
 
+        transfer_layout = QHBoxLayout()
+        self.fragments_label = QLabel("Fragments:")
+        self.fragments_spin = QSpinBox()
+        self.fragments_spin.setRange(1, MAX_CONCURRENT_FRAGMENTS)
+        self.fragments_spin.setValue(1)
+        self.chunk_size_label = QLabel("Chunk size:")
+        self.chunk_size_input = QLineEdit()
+        self.chunk_size_input.setPlaceholderText("e.g. 10M")
+        self.chunk_size_input.setMaximumWidth(80)
+        self.external_downloader_label = QLabel("Downloader:")
+        self.external_downloader_combo = QComboBox()
+        self.external_downloader_combo.addItems(["Default"] + EXTERNAL_DOWNLOADERS)
+        transfer_layout.addWidget(self.fragments_label)
+        transfer_layout.addWidget(self.fragments_spin)
+        transfer_layout.addWidget(self.chunk_size_label)
+        transfer_layout.addWidget(self.chunk_size_input)
+        transfer_layout.addWidget(self.external_downloader_label)
+        transfer_layout.addWidget(self.external_downloader_combo)
+        download_layout.addLayout(transfer_layout)
+
         self.custom_arg_label = QLabel("Custom arguments:")
         self.custom_arg_input = QLineEdit()
         self.custom_arg_input.setPlaceholderText("None")
@@ -117,8 +250,11 @@ class VideoDownloaderGUI(QWidget):
         self.cmd_preview_label = QLabel("Command preview:")
         self.cmd_preview_text = QLabel("")
         self.cmd_preview_text.setWordWrap(True)
+        self.format_plan_text = QLabel("")
+        self.format_plan_text.setWordWrap(True)
         download_layout.addWidget(self.cmd_preview_label)
         download_layout.addWidget(self.cmd_preview_text)
+        download_layout.addWidget(self.format_plan_text)
 
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
@@ -127,7 +263,7 @@ class VideoDownloaderGUI(QWidget):
         buttons_layout = QHBoxLayout()
         self.start_button = QPushButton("Start")
         self.start_button.clicked.connect(self.start_download)
-        self.stop_button = QPushButton("Stop")
+        self.stop_button = QPushButton("Stop all")
         self.stop_button.setEnabled(False)
         self.stop_button.clicked.connect(self.stop_download)
         buttons_layout.addWidget(self.start_button)
@@ -136,37 +272,127 @@ class VideoDownloaderGUI(QWidget):
 
         switch_layout = QHBoxLayout()
         self.download_tab_btn = QPushButton("Download")
+        self.queue_tab_btn = QPushButton("Queue")
         self.console_tab_btn = QPushButton("Console output")
         self.download_tab_btn.clicked.connect(lambda: self.switch_tab(0))
-        self.console_tab_btn.clicked.connect(lambda: self.switch_tab(1))
+        self.queue_tab_btn.clicked.connect(lambda: self.switch_tab(1))
+        self.console_tab_btn.clicked.connect(lambda: self.switch_tab(2))
         switch_layout.addWidget(self.download_tab_btn)
+        switch_layout.addWidget(self.queue_tab_btn)
         switch_layout.addWidget(self.console_tab_btn)
         main_layout.addLayout(switch_layout)
 
         download_widget.setLayout(download_layout)
         self.stack.addWidget(download_widget)
 
+        queue_widget = QWidget()
+        queue_layout = QVBoxLayout(queue_widget)
+        workers_layout = QHBoxLayout()
+        self.workers_label = QLabel("Parallel downloads:")
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 8)
+        self.workers_spin.setValue(DEFAULT_WORKERS)
+        self.workers_spin.valueChanged.connect(self.set_workers)
+        workers_layout.addWidget(self.workers_label)
+        workers_layout.addWidget(self.workers_spin)
+        workers_layout.addStretch()
+        self.pipeline_label = QLabel("")
+        workers_layout.addWidget(self.pipeline_label)
+        queue_layout.addLayout(workers_layout)
+
+        bandwidth_layout = QHBoxLayout()
+        self.bandwidth_label = QLabel("Bandwidth:")
+        self.bandwidth_input = QLineEdit()
+        self.bandwidth_input.setPlaceholderText("Unlimited")
+        self.bandwidth_input.setMaximumWidth(80)
+        self.night_bandwidth_label = QLabel("Night:")
+        self.night_bandwidth_input = QLineEdit()
+        self.night_bandwidth_input.setPlaceholderText("Same")
+        self.night_bandwidth_input.setMaximumWidth(80)
+        self.night_start_spin = QSpinBox()
+        self.night_start_spin.setRange(0, 23)
+        self.night_start_spin.setValue(NIGHT_START)
+        self.night_start_spin.setSuffix(":00")
+        self.night_end_spin = QSpinBox()
+        self.night_end_spin.setRange(0, 23)
+        self.night_end_spin.setValue(NIGHT_END)
+        self.night_end_spin.setSuffix(":00")
+        self.bandwidth_input.editingFinished.connect(self.apply_bandwidth)
+        self.night_bandwidth_input.editingFinished.connect(self.apply_bandwidth)
+        self.night_start_spin.valueChanged.connect(self.apply_bandwidth)
+        self.night_end_spin.valueChanged.connect(self.apply_bandwidth)
+        bandwidth_layout.addWidget(self.bandwidth_label)
+        bandwidth_layout.addWidget(self.bandwidth_input)
+        bandwidth_layout.addWidget(self.night_bandwidth_label)
+        bandwidth_layout.addWidget(self.night_bandwidth_input)
+        bandwidth_layout.addWidget(self.night_start_spin)
+        bandwidth_layout.addWidget(QLabel("-"))
+        bandwidth_layout.addWidget(self.night_end_spin)
+        bandwidth_layout.addStretch()
+        queue_layout.addLayout(bandwidth_layout)
+
+        self.queue_table = QTableWidget(0, 3)
+        self.queue_table.setHorizontalHeaderLabels(["Title", "Status", "Progress"])
+        self.queue_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.queue_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        queue_layout.addWidget(self.queue_table)
+        self.metrics_label = QLabel("")
+        self.metrics_label.setToolTip(f"Prometheus metrics are written to {METRICS_PATH}")
+        queue_layout.addWidget(self.metrics_label)
+
+        queue_buttons_layout = QHBoxLayout()
+        self.job_up_button = QPushButton("Move up")
+        self.job_up_button.clicked.connect(lambda: self.change_job_priority(1))
+        self.job_down_button = QPushButton("Move down")
+        self.job_down_button.clicked.connect(lambda: self.change_job_priority(-1))
+        self.job_cancel_button = QPushButton("Cancel")
+        self.job_cancel_button.clicked.connect(self.cancel_selected_job)
+        self.clear_finished_button = QPushButton("Clear finished")
+        self.clear_finished_button.clicked.connect(self.clear_finished_jobs)
+        queue_buttons_layout.addWidget(self.job_up_button)
+        queue_buttons_layout.addWidget(self.job_down_button)
+        queue_buttons_layout.addWidget(self.job_cancel_button)
+        queue_buttons_layout.addWidget(self.clear_finished_button)
+        queue_layout.addLayout(queue_buttons_layout)
+        queue_widget.setLayout(queue_layout)
+        self.stack.addWidget(queue_widget)
+
         console_widget = QWidget()
         console_layout = QVBoxLayout(console_widget)
-        self.console_output = QTextEdit()
+        self.console_output = QPlainTextEdit()
         self.console_output.setReadOnly(True)
+        self.console_output.setMaximumBlockCount(DEFAULT_SCROLLBACK)
         console_layout.addWidget(self.console_output)
+        console_buttons_layout = QHBoxLayout()
+        self.scrollback_label = QLabel("Scrollback lines:")
+        self.scrollback_spin = QSpinBox()
+        self.scrollback_spin.setRange(100, 100000)
+        self.scrollback_spin.setSingleStep(1000)
+        self.scrollback_spin.setValue(DEFAULT_SCROLLBACK)
+        self.scrollback_spin.valueChanged.connect(self.set_scrollback)
+        self.full_log_button = QPushButton("Open full log")
+        self.full_log_button.clicked.connect(self.open_full_log)
+        console_buttons_layout.addWidget(self.scrollback_label)
+        console_buttons_layout.addWidget(self.scrollback_spin)
+        console_buttons_layout.addStretch()
+        console_buttons_layout.addWidget(self.full_log_button)
+        console_layout.addLayout(console_buttons_layout)
         console_widget.setLayout(console_layout)
         self.stack.addWidget(console_widget)
 
         self.setLayout(main_layout)
         self.toggle_audio_only(False)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_command_preview)
-        self.timer.start(500)
-
         self.switch_tab(0)
 
     def switch_tab(self, index):
         self.stack.setCurrentIndex(index)
         self.download_tab_btn.setEnabled(index != 0)
-        self.console_tab_btn.setEnabled(index != 1)
+        self.queue_tab_btn.setEnabled(index != 1)
+        self.console_tab_btn.setEnabled(index != 2)
 
     def toggle_audio_only(self, state):
         audio_only = bool(state)
@@ -180,86 +406,239 @@ class VideoDownloaderGUI(QWidget):
         if folder:
             self.path_input.setText(folder)
 
-    def build_command(self):
-        url = self.url_input.text().strip()
-        path = self.path_input.text().strip()
-        cookies = self.cookies_combo.currentText()
-        audio_only = self.audio_only_checkbox.isChecked()
-        audio_format = self.audio_format_combo.currentText()
-        audio_quality = self.audio_quality_combo.currentText()
-        video_format = self.video_format_combo.currentText()
-        video_quality = self.video_quality_combo.currentText()
-        frag_from = self.frag_from.text().strip()
-        frag_to = self.frag_to.text().strip()
-        custom_arg = self.custom_arg_input.text().strip()
-
-        cmd = ["yt-dlp"]
-
-        if cookies and cookies.lower() != "none":
-            cmd += ["--cookies-from-browser", cookies.lower()]
-        if frag_from and frag_to:
-            cmd += ["--download-sections", f'"*{frag_from}-{frag_to}"']
-        if audio_only:
-            cmd.append("-x")
-            if audio_format.lower() != "default":
-                cmd += ["--audio-format", audio_format.lower()]
-            if audio_quality.lower() != "default":
-                cmd += ["--audio-quality", audio_quality.replace("kbps", "K")]
-        else:
-            if video_quality.lower() != "default":
-                res_value = video_quality.replace("p", "")
-                cmd += ["-S", f"res:{res_value}"]
-            if video_format.lower() != "default":
-                cmd += ["--merge-output-format", video_format.lower()]
-        if custom_arg:
-            cmd += [custom_arg]
-        if url:
-            cmd.append(url)
-        return " ".join(cmd)
+    def connect_preview_signals(self):
+        for line_edit in (self.url_input, self.path_input, self.frag_from, self.frag_to, self.sections_input,
+                          self.custom_arg_input, self.chunk_size_input):
+            line_edit.textChanged.connect(self.update_command_preview)
+        for combo in (self.cookies_combo, self.engine_combo, self.video_quality_combo, self.video_format_combo,
+                      self.audio_quality_combo, self.audio_format_combo, self.external_downloader_combo,
+                      self.cut_mode_combo):
+            combo.currentTextChanged.connect(self.update_command_preview)
+        for checkbox in (self.audio_only_checkbox, self.skip_archived_checkbox):
+            checkbox.stateChanged.connect(self.update_command_preview)
+        self.fragments_spin.valueChanged.connect(self.update_command_preview)
+
+    def current_spec(self):
+        return JobSpec.from_options(self.url_input.text().strip(), self.path_input.text().strip(), self.collect_options())
 
     def update_command_preview(self):
-        self.cmd_preview_text.setText(self.build_command())
+        spec = self.current_spec()
+        error = validate_transfer_options(
+            spec.concurrent_fragments, spec.http_chunk_size, spec.external_downloader
+        ) or validate_sections(spec.frag_from, spec.frag_to, spec.sections)
+        if error:
+            self.cmd_preview_text.setText(f"(invalid: {error})")
+            self.format_plan_text.setText("")
+            return
+        argv = self.downloader.command_for(spec)
+        if not spec.url:
+            argv = argv[:-1]
+        self.cmd_preview_text.setText(format_command(argv))
+        plan = self.downloader.plan_for(spec)
+        self.format_plan_text.setText(f"Format plan: {plan.describe()}" if plan else "")
+
+    def collect_options(self):
+        return {
+            "cookies": self.cookies_combo.currentText(),
+            "audio_only": self.audio_only_checkbox.isChecked(),
+            "audio_format": self.audio_format_combo.currentText(),
+            "audio_quality": self.audio_quality_combo.currentText(),
+            "video_format": self.video_format_combo.currentText(),
+            "video_quality": self.video_quality_combo.currentText(),
+            "frag_from": self.frag_from.text().strip(),
+            "frag_to": self.frag_to.text().strip(),
+            "sections": self.sections_input.text().strip(),
+            "cut_mode": self.cut_mode_combo.currentText(),
+            "custom_arg": self.custom_arg_input.text().strip(),
+            "concurrent_fragments": self.fragments_spin.value(),
+            "http_chunk_size": self.chunk_size_input.text().strip(),
+            "external_downloader": self.external_downloader_combo.currentText(),
+            "engine": self.engine_combo.currentText(),
+            "skip_archived": self.skip_archived_checkbox.isChecked(),
+        }
 
     def start_download(self):
-        popup = PopupManager(self)
-        self.downloader = Downloader(popup, progress_callback=self.update_progress, output_callback=self.update_console)
         url = self.url_input.text().strip()
         path = self.path_input.text().strip()
-        cookies = self.cookies_combo.currentText()
-        audio_only = self.audio_only_checkbox.isChecked()
-        audio_format = self.audio_format_combo.currentText()
-        audio_quality = self.audio_quality_combo.currentText()
-        video_format = self.video_format_combo.currentText()
-        video_quality = self.video_quality_combo.currentText()
-        frag_from = self.frag_from.text().strip()
-        frag_to = self.frag_to.text().strip()
-        custom_arg = self.custom_arg_input.text().strip()
-
-        self.start_button.setEnabled(False)
-        self.stop_button.setEnabled(True)
-
-        self.downloader.download_video(
-            url, path, cookies=cookies, audio_only=audio_only,
-            audio_format=audio_format, audio_quality=audio_quality,
-            video_format=video_format, video_quality=video_quality,
-            frag_from=frag_from, frag_to=frag_to,
-            custom_arg=custom_arg,
-            on_finished=self.on_download_finished
-        )
 
-    def on_download_finished(self):
+        if self.playlist_checkbox.isChecked():
+            if self.downloader.expand_playlist(url, path, self.cookies_combo.currentText()):
+                self.start_button.setEnabled(False)
+            return
+
+        job = self.downloader.download_video(url, path, **self.collect_options())
+        if job:
+            self.url_input.clear()
+
+    def on_playlist_expanded(self, url, title, entries):
         self.start_button.setEnabled(True)
-        self.stop_button.setEnabled(False)
-        self.progress_bar.setValue(0)
+        if entries is None:
+            return
+        if not entries:
+            self.popup.show_info("The playlist is empty.")
+            return
+        dialog = PlaylistDialog(self, title, entries)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        selected = dialog.selected_entries()
+        if not selected:
+            return
+        jobs = self.downloader.download_playlist(
+            selected, self.path_input.text().strip(),
+            limit=dialog.limit_spin.value(), **self.collect_options()
+        )
+        if jobs:
+            self.url_input.clear()
+            self.switch_tab(1)
 
     def stop_download(self):
-        if hasattr(self, "downloader") and self.downloader:
-            self.downloader.stop_download()
-        self.start_button.setEnabled(True)
-        self.stop_button.setEnabled(False)
+        self.downloader.stop_download()
+
+    def probe_url(self):
+        url = self.url_input.text().strip()
+        if self.downloader.probe(url, self.cookies_combo.currentText()):
+            self.probe_button.setEnabled(False)
+
+    def on_probe_finished(self, url, info):
+        self.probe_button.setEnabled(True)
+        if not info or url != self.url_input.text().strip():
+            return
+        self.set_combo_items(self.video_quality_combo, [f"{h}p" for h in video_heights(info)])
+        self.set_combo_items(self.audio_quality_combo, [f"{r}kbps" for r in audio_bitrates(info)])
+        native = video_containers(info)
+        formats = native + [f for f in VIDEO_FORMATS if f not in native]
+        self.set_combo_items(self.video_format_combo, formats)
+        self.update_command_preview()
+        self.popup.show_info(f"Found {len(info.get('formats') or [])} formats.")
+
+    def set_combo_items(self, combo, items):
+        current = combo.currentText()
+        combo.clear()
+        combo.addItems(["Default"] + items)
+        index = combo.findText(current)
+        combo.setCurrentIndex(index if index >= 0 else 0)
+
+    def closeEvent(self, event):
+        self.downloader.shutdown()
+        self.console.flush()
+        super().closeEvent(event)
+
+    def set_workers(self, value):
+        self.downloader.set_workers(value)
+
+    def apply_bandwidth(self):
+        try:
+            day_limit = parse_rate(self.bandwidth_input.text())
+            night_limit = parse_rate(self.night_bandwidth_input.text())
+        except ValueError as e:
+            self.popup.show_error(str(e))
+            return
+        self.downloader.set_bandwidth(
+            day_limit, night_limit, self.night_start_spin.value(), self.night_end_spin.value()
+        )
+
+    def selected_job(self):
+        row = self.queue_table.currentRow()
+        if row < 0:
+            return None
+        for job_id, job_row in self.job_rows.items():
+            if job_row == row:
+                return self.downloader.queue.get(job_id)
+        return None
+
+    def change_job_priority(self, delta):
+        job = self.selected_job()
+        if job and not self.downloader.set_job_priority(job.id, job.priority + delta):
+            self.popup.show_info("Only queued downloads can be reordered.")
+
+    def cancel_selected_job(self):
+        job = self.selected_job()
+        if job:
+            self.downloader.cancel_job(job.id)
+
+    def clear_finished_jobs(self):
+        for job in self.downloader.clear_finished():
+            row = self.job_rows.pop(job.id, None)
+            if row is None:
+                continue
+            self.queue_table.removeRow(row)
+            for job_id, job_row in self.job_rows.items():
+                if job_row > row:
+                    self.job_rows[job_id] = job_row - 1
+
+    def update_job_row(self, job):
+        row = self.job_rows.get(job.id)
+        if row is None:
+            if job.finished and self.downloader.queue.get(job.id) is None:
+                return
+            row = self.queue_table.rowCount()
+            self.queue_table.insertRow(row)
+            title_item = QTableWidgetItem(job.title)
+            title_item.setToolTip(job.url)
+            self.queue_table.setItem(row, 0, title_item)
+            self.queue_table.setItem(row, 1, QTableWidgetItem(""))
+            bar = QProgressBar()
+            bar.setValue(0)
+            self.queue_table.setCellWidget(row, 2, bar)
+            self.job_rows[job.id] = row
+        status = job.state
+        if job.state == QUEUED and job.priority:
+            status = f"{job.state} ({job.priority:+d})"
+        elif job.state == RUNNING and job.record is not None:
+            status = job.record.describe()
+        elif job.state == PROCESSING:
+            status = "Post-processing"
+        details = [job.message]
+        details.append(", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in job.stage_times.items()))
+        details.append(job.metrics.describe())
+        self.queue_table.item(row, 1).setText(status)
+        self.queue_table.item(row, 1).setToolTip("\n".join(d for d in details if d))
+        self.queue_table.cellWidget(row, 2).setValue(int(job.progress))
+        self.stop_button.setEnabled(bool(self.downloader.queue.active_jobs()))
+        self.update_pipeline_label()
+        if job.finished:
+            self.update_metrics_label()
+
+    def update_metrics_label(self):
+        summary = self.downloader.metrics_summary()
+        if not summary["jobs"]:
+            self.metrics_label.setText("")
+            return
+        parts = [", ".join(f"{count} {state.lower()}" for state, count in sorted(summary["jobs"].items()))]
+        for key, label in (("median_extraction", "extraction"), ("median_ttfb", "first byte"),
+                           ("median_download", "download"), ("median_postprocess", "post-processing")):
+            if summary[key] is not None:
+                parts.append(f"median {label} {summary[key]:.1f}s")
+        if summary["median_throughput"]:
+            parts.append(f"median throughput {summary['median_throughput'] / (1024 * 1024):.2f} MiB/s")
+        parts.append(f"{summary['retries']} retries")
+        parts.append(f"{summary['disk_bytes'] / (1024 * 1024):.1f} MiB on disk")
+        self.metrics_label.setText("Finished: " + " | ".join(parts))
+
+    def update_pipeline_label(self):
+        stats = self.downloader.pipeline_stats()
+        download, postprocess = stats["download"], stats["postprocess"]
+        self.pipeline_label.setText(
+            f"Downloading {download['active']}/{download['workers']} ({download['waiting']} queued), "
+            f"post-processing {postprocess['active']}/{postprocess['workers']} ({postprocess['waiting']} waiting)"
+        )
 
     def update_progress(self, percent):
         self.progress_bar.setValue(int(percent))
 
-    def update_console(self, text):
-        self.console_output.append(text)
\ No newline at end of file
+    def flush_console(self):
+        lines, dropped = self.console.drain()
+        if not lines:
+            return
+        if dropped:
+            lines.insert(0, f"... {dropped} lines skipped, see full log ...")
+        self.console_output.appendPlainText("\n".join(lines))
+
+    def set_scrollback(self, value):
+        self.console.set_scrollback(value)
+        self.console_output.setMaximumBlockCount(value)
+
+    def open_full_log(self):
+        self.console.flush()
+        if not QDesktopServices.openUrl(QUrl.fromLocalFile(str(LOG_PATH))):
+            self.popup.show_error("Cannot open the log file.")
\ No newline at end of file
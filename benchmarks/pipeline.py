@@ -0,0 +1,462 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_RUNS = 3
+DEFAULT_JOBS = 8
+DEFAULT_WORKERS = 2
+DEFAULT_SIZE_MIB = 4
+DEFAULT_SEGMENTS = 16
+DEFAULT_PROGRESS_HZ = 20
+DEFAULT_DEPENDENCY_MIB = 16
+CHUNK_SIZE = 64 * 1024
+PATTERN = bytes(range(256)) * (CHUNK_SIZE // 256)
+RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)")
+PROGRESS_HZ_ENV = "GVD_BENCH_PROGRESS_HZ"
+DEPENDENCY_ASSET = "yt-dlp_bench.zip"
+
+
+def _ms(start, end):
+    return round((end - start) * 1000, 1)
+
+
+def _content(offset, length):
+    out = bytearray()
+    while length > 0:
+        start = offset % len(PATTERN)
+        piece = PATTERN[start:start + length]
+        out += piece
+        offset += len(piece)
+        length -= len(piece)
+    return bytes(out)
+
+
+def _sha256(size):
+    digest = hashlib.sha256()
+    for offset in range(0, size, CHUNK_SIZE):
+        digest.update(_content(offset, min(CHUNK_SIZE, size - offset)))
+    return digest.hexdigest()
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve()
+
+    def _serve(self, head=False):
+        config = self.server.config
+        path = urlsplit(self.path).path
+        if path == "/":
+            return self._send_bytes(b"ok", "text/plain", head)
+        if path.endswith("/index.m3u8"):
+            lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:4", "#EXT-X-MEDIA-SEQUENCE:0"]
+            for i in range(config["segments"]):
+                lines += ["#EXTINF:4.0,", f"seg{i}.ts"]
+            lines.append("#EXT-X-ENDLIST")
+            return self._send_bytes("\n".join(lines).encode(), "application/vnd.apple.mpegurl", head)
+        if path.startswith("/hls/") and path.endswith(".ts"):
+            return self._send_range(config["segment_size"], "video/mp2t", head)
+        if path.startswith("/media/"):
+            return self._send_range(config["size"], "video/mp4", head)
+        if path == f"/release/{DEPENDENCY_ASSET}":
+            return self._send_range(config["dependency_size"], "application/octet-stream", head)
+        if path == "/release/SHA2-256SUMS":
+            text = f"{self.server.dependency_sha256}  {DEPENDENCY_ASSET}\n"
+            return self._send_bytes(text.encode(), "text/plain", head)
+        self.send_error(404)
+
+    def _send_bytes(self, body, content_type, head):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _send_range(self, size, content_type, head):
+        first, last = 0, size - 1
+        match = RANGE_RE.match(self.headers.get("Range", ""))
+        if match:
+            first = int(match.group(1))
+            last = min(size - 1, int(match.group(2))) if match.group(2) else size - 1
+        self.send_response(206 if match else 200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(last - first + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{size}"')
+        if match:
+            self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+        self.end_headers()
+        if head:
+            return
+        rate = self.server.config["rate"]
+        offset = first
+        while offset <= last:
+            started = time.monotonic()
+            piece = _content(offset, min(CHUNK_SIZE, last - offset + 1))
+            self.wfile.write(piece)
+            offset += len(piece)
+            if rate:
+                delay = len(piece) / rate - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+
+def start_server(config):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MediaHandler)
+    httpd.daemon_threads = True
+    httpd.config = config
+    httpd.dependency_sha256 = _sha256(config["dependency_size"])
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+def _progress(prefix, filename, downloaded, total, started, fragment=None):
+    elapsed = time.monotonic() - started
+    speed = downloaded / elapsed if elapsed > 0 else None
+    record = {
+        "status": "finished" if downloaded >= total else "downloading",
+        "downloaded_bytes": downloaded,
+        "total_bytes": total if fragment is None else None,
+        "total_bytes_estimate": total if fragment is not None else None,
+        "speed": speed,
+        "eta": int((total - downloaded) / speed) if speed else None,
+        "elapsed": elapsed,
+        "fragment_index": fragment[0] if fragment else None,
+        "fragment_count": fragment[1] if fragment else None,
+        "filename": filename,
+    }
+    print(f"{prefix} download {json.dumps(record)}", flush=True)
+
+
+def fake_yt_dlp(argv):
+    sys.path.insert(0, str(ROOT))
+    from resources.progress import PROGRESS_PREFIX
+
+    interval = 1.0 / float(os.environ.get(PROGRESS_HZ_ENV) or DEFAULT_PROGRESS_HZ)
+    home = argv[argv.index("-P") + 1] if "-P" in argv else "."
+    formats = argv[argv.index("-f") + 1] if "-f" in argv else "best"
+    url = argv[-1]
+    parts = urlsplit(url).path.strip("/").split("/")
+    video_id = parts[1].split(".")[0]
+    print(f"[generic] Extracting URL: {url}", flush=True)
+    archive = argv[argv.index("--download-archive") + 1] if "--download-archive" in argv else None
+    if archive and os.path.exists(archive):
+        with open(archive, encoding="utf-8") as f:
+            if f"generic {video_id}" in f.read().splitlines():
+                print(f"[download] Clip {video_id} has already been recorded in the archive", flush=True)
+                return 0
+    for n, fmt in enumerate(formats.split(",")):
+        format_id, ext = ("140", "m4a") if fmt.startswith("ba") or n else ("137", "mp4")
+        name = f"Clip {video_id} [{video_id}].f{format_id}.{ext}" if "-o" in argv else f"Clip {video_id} [{video_id}].{ext}"
+        filename = os.path.join(home, name)
+        print(f"[info] {video_id}: Downloading 1 format(s): {format_id}", flush=True)
+        print(f"[download] Destination: {filename}", flush=True)
+        started = last = time.monotonic()
+        with open(filename, "wb") as out:
+            if url.endswith(".m3u8"):
+                base = url.rsplit("/", 1)[0]
+                with urlopen(url) as r:
+                    segments = [line for line in r.read().decode().splitlines() if line and not line.startswith("#")]
+                downloaded = 0
+                for i, segment in enumerate(segments, 1):
+                    with urlopen(f"{base}/{segment}") as r:
+                        data = r.read()
+                    out.write(data)
+                    downloaded += len(data)
+                    estimate = downloaded * len(segments) // i
+                    now = time.monotonic()
+                    if now - last >= interval or i == len(segments):
+                        last = now
+                        _progress(PROGRESS_PREFIX, filename, downloaded, estimate, started, (i, len(segments)))
+            else:
+                with urlopen(url) as r:
+                    total = int(r.headers.get("Content-Length") or 0)
+                    downloaded = 0
+                    while True:
+                        data = r.read(CHUNK_SIZE)
+                        if not data:
+                            break
+                        out.write(data)
+                        downloaded += len(data)
+                        now = time.monotonic()
+                        if now - last >= interval:
+                            last = now
+                            _progress(PROGRESS_PREFIX, filename, downloaded, total, started)
+                _progress(PROGRESS_PREFIX, filename, downloaded, downloaded, started)
+    if archive:
+        with open(archive, "a", encoding="utf-8") as f:
+            f.write(f"generic {video_id}\n")
+    return 0
+
+
+def fake_ffmpeg(argv):
+    inputs = [argv[i + 1] for i, arg in enumerate(argv) if arg == "-i"]
+    with open(argv[-1], "wb") as out:
+        for path in inputs:
+            with open(path, "rb") as src:
+                while chunk := src.read(1024 * 1024):
+                    out.write(chunk)
+    return 0
+
+
+def fake_ffprobe(argv):
+    if "v:0" in argv:
+        print("" if argv[-1].endswith(".m4a") else "h264")
+    else:
+        print("aac")
+    return 0
+
+
+def make_tools(directory):
+    tools = {"yt-dlp": "--fake-yt-dlp", "ffmpeg": "--fake-ffmpeg", "ffprobe": "--fake-ffprobe"}
+    for name, flag in tools.items():
+        path = directory / name
+        path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).resolve()}" {flag} "$@"\n')
+        path.chmod(0o755)
+    return directory / "yt-dlp"
+
+
+def measure_parse(tools_dir, base, download_path):
+    from resources.progress import parse_progress_line
+
+    result = subprocess.run(
+        [str(tools_dir / "yt-dlp"), "-P", str(download_path), "-f", "bv,ba", "-o", "x", f"{base}/media/parse.mp4"],
+        capture_output=True, text=True, timeout=120
+    )
+    lines = [line.strip() for line in result.stdout.splitlines()]
+    repeat = max(1, 20000 // max(1, len(lines)))
+    started = time.process_time()
+    for _ in range(repeat):
+        for line in lines:
+            parse_progress_line(line)
+    elapsed = time.process_time() - started
+    return len(lines), elapsed * 1000 / repeat, elapsed * 1e6 / (repeat * max(1, len(lines)))
+
+
+def measure_install(base, directory):
+    from resources.reqdownloader import DependencyManager
+
+    manager = DependencyManager(None, directory / "requirements", directory / "version_info.json")
+    release = {
+        "tag_name": "bench",
+        "published_at": "2024-01-01T00:00:00Z",
+        "assets": [
+            {"name": DEPENDENCY_ASSET, "browser_download_url": f"{base}/release/{DEPENDENCY_ASSET}"},
+            {"name": "SHA2-256SUMS", "browser_download_url": f"{base}/release/SHA2-256SUMS"},
+        ],
+    }
+    started = time.perf_counter()
+    manager._install_yt_dlp(release)
+    return _ms(started, time.perf_counter())
+
+
+class _NullPopup:
+    def show_info(self, message):
+        pass
+
+    def show_error(self, message):
+        pass
+
+    def show_success(self, message):
+        pass
+
+
+def child(config):
+    sys.path.insert(0, str(ROOT))
+    os.environ[PROGRESS_HZ_ENV] = str(config["progress_hz"])
+    from PySide6.QtCore import QCoreApplication, QObject, QTimer, Slot
+    qt_app = QCoreApplication(sys.argv[:1])
+    from resources.connectivity import connectivity
+    from resources.downloader import Downloader
+
+    class SignalCounter(QObject):
+        def __init__(self):
+            super().__init__()
+            self.jobs = 0
+            self.progress = 0
+
+        @Slot(object)
+        def on_job(self, job):
+            self.jobs += 1
+
+        @Slot(float)
+        def on_progress(self, value):
+            self.progress += 1
+
+    httpd, base = start_server(config)
+    connectivity.urls = (base,)
+    with tempfile.TemporaryDirectory(prefix="gvd-bench-") as tmp:
+        tmp = Path(tmp)
+        tools_dir = tmp / "tools"
+        tools_dir.mkdir()
+        yt_dlp_path = make_tools(tools_dir)
+        download_path = tmp / "downloads"
+        download_path.mkdir()
+
+        parse_lines, parse_cpu_ms, parse_us_per_line = measure_parse(tools_dir, base, download_path)
+        install_ms = measure_install(base, tmp)
+
+        downloader = Downloader(
+            _NullPopup(), workers=config["workers"], yt_dlp_path=yt_dlp_path, ffmpeg_dir=tools_dir
+        )
+        counter = SignalCounter()
+        downloader.job_signal.connect(counter.on_job)
+        downloader.progress_signal.connect(counter.on_progress)
+
+        urls = [
+            f"{base}/hls/clip{i}/index.m3u8" if config["hls"] and i % 2 else f"{base}/media/clip{i}.mp4"
+            for i in range(config["jobs"])
+        ]
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        jobs = [downloader.download_video(url, str(download_path)) for url in urls]
+
+        def poll():
+            if all(job is None or job.finished for job in jobs):
+                qt_app.quit()
+            else:
+                QTimer.singleShot(20, poll)
+
+        QTimer.singleShot(0, poll)
+        QTimer.singleShot(config["timeout"] * 1000, qt_app.quit)
+        qt_app.exec()
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+        downloader.shutdown()
+        httpd.shutdown()
+
+    done = sum(1 for job in jobs if job is not None and job.state == "Done")
+    signals = counter.jobs + counter.progress
+    result = {
+        "jobs": len(jobs),
+        "jobs_done": done,
+        "wall_s": round(wall, 3),
+        "jobs_per_sec": round(done / wall, 3) if wall else None,
+        "ui_signals": signals,
+        "ui_signals_per_sec": round(signals / wall, 1) if wall else None,
+        "app_cpu_s": round(cpu, 3),
+        "parse_lines": parse_lines,
+        "parse_cpu_ms": round(parse_cpu_ms, 3),
+        "parse_us_per_line": round(parse_us_per_line, 2),
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "dependency_install_ms": install_ms,
+    }
+    print(json.dumps(result))
+
+
+def run_once(config):
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", json.dumps(config)],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=dict(os.environ),
+        timeout=config["timeout"] + 120
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(result.stderr.strip() or "Pipeline benchmark child failed.")
+    return json.loads(lines[-1])
+
+
+def summarize(runs):
+    summary = {}
+    for key, value in runs[0].items():
+        if not isinstance(value, (int, float)):
+            continue
+        values = [run[key] for run in runs if run[key] is not None]
+        if values:
+            summary[key] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+    return summary
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    fakes = {"--fake-yt-dlp": fake_yt_dlp, "--fake-ffmpeg": fake_ffmpeg, "--fake-ffprobe": fake_ffprobe}
+    if argv and argv[0] in fakes:
+        return fakes[argv[0]](argv[1:])
+
+    parser = argparse.ArgumentParser(description="Measure the download pipeline offline against a local media server.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="downloads per run")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel downloads")
+    parser.add_argument("--size-mib", type=float, default=DEFAULT_SIZE_MIB, help="size of each progressive file")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS, help="HLS segments per stream")
+    parser.add_argument("--no-hls", dest="hls", action="store_false", help="serve only progressive files")
+    parser.add_argument("--progress-hz", type=float, default=DEFAULT_PROGRESS_HZ, help="progress lines per second per stream")
+    parser.add_argument("--rate", type=int, default=0, help="server bytes per second per connection (0 = unlimited)")
+    parser.add_argument("--dependency-mib", type=float, default=DEFAULT_DEPENDENCY_MIB, help="size of the fake dependency")
+    parser.add_argument("--timeout", type=int, default=300)
+    parser.add_argument("--json", dest="json_path", help="write the results to this file")
+    parser.add_argument("--min-jobs-per-sec", type=float, help="fail if the jobs/sec median is lower")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(json.loads(args.child))
+        return 0
+
+    size = int(args.size_mib * 1024 * 1024)
+    config = {
+        "jobs": args.jobs,
+        "workers": args.workers,
+        "size": size,
+        "segments": args.segments,
+        "segment_size": max(1, size // max(1, args.segments)),
+        "hls": args.hls,
+        "progress_hz": args.progress_hz,
+        "rate": args.rate,
+        "dependency_size": int(args.dependency_mib * 1024 * 1024),
+        "timeout": args.timeout,
+    }
+    runs = [run_once(config) for _ in range(max(1, args.runs))]
+    summary = summarize(runs)
+    report = {
+        "benchmark": "pipeline",
+        "config": config,
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "runs": runs,
+        "summary": summary,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+    for key, stats in summary.items():
+        print(f"{key:22} median {stats['median']:10.2f}  min {stats['min']:10.2f}  max {stats['max']:10.2f}")
+
+    failed = any(run["jobs_done"] != run["jobs"] for run in runs)
+    if failed:
+        print("Some benchmark downloads did not finish.", file=sys.stderr)
+    rate = summary.get("jobs_per_sec")
+    if args.min_jobs_per_sec and rate and rate["median"] < args.min_jobs_per_sec:
+        print(f"Throughput {rate['median']} jobs/s is below {args.min_jobs_per_sec} jobs/s.", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("requests", "validators", "app", "resources.downloader", "resources.core")
+DEFAULT_RUNS = 5
+
+
+def _ms(start, end):
+    return round((end - start) * 1000, 1)
+
+
+def child():
+    sys.path.insert(0, str(ROOT))
+    started = time.perf_counter()
+    from PySide6.QtCore import QEvent, QObject, QTimer
+    from PySide6.QtWidgets import QApplication
+    qt_imported = time.perf_counter()
+    qt_app = QApplication(sys.argv[:1])
+    from launcher import Launcher
+    launcher_imported = time.perf_counter()
+    eager = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    marks = {}
+
+    class PaintProbe(QObject):
+        def __init__(self, name):
+            super().__init__()
+            self.name = name
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and self.name not in marks:
+                marks[self.name] = time.perf_counter()
+                QTimer.singleShot(0, steps.pop(0))
+            return False
+
+    def resource_path(relative_path):
+        return ROOT / relative_path
+
+    launcher = Launcher(resource_path)
+    launcher_probe = PaintProbe("launcher_paint")
+    launcher.installEventFilter(launcher_probe)
+    apply_requirements = launcher.apply_requirements
+
+    def on_requirements(states):
+        marks.setdefault("launcher_ready", time.perf_counter())
+        apply_requirements(states)
+
+    launcher.apply_requirements = on_requirements
+    launcher.show()
+    shown = time.perf_counter()
+
+    def wait_ready():
+        if "launcher_ready" in marks:
+            open_app()
+        else:
+            QTimer.singleShot(5, wait_ready)
+
+    def open_app():
+        marks["app_import_start"] = time.perf_counter()
+        from app import VideoDownloaderGUI
+        marks["app_imported"] = time.perf_counter()
+        window = VideoDownloaderGUI(resource_path)
+        marks["app_constructed"] = time.perf_counter()
+        probe = PaintProbe("app_paint")
+        window.installEventFilter(probe)
+        launcher.window = window
+        launcher.app_probe = probe
+        window.show()
+
+    def finish():
+        launcher.window.close()
+        qt_app.quit()
+
+    steps = [wait_ready, finish]
+    QTimer.singleShot(10000, qt_app.quit)
+    qt_app.exec()
+
+    result = {
+        "qt_import_ms": _ms(started, qt_imported),
+        "launcher_import_ms": _ms(qt_imported, launcher_imported),
+        "launcher_show_ms": _ms(launcher_imported, shown),
+        "launcher_first_paint_ms": _ms(started, marks["launcher_paint"]) if "launcher_paint" in marks else None,
+        "launcher_ready_ms": _ms(started, marks["launcher_ready"]) if "launcher_ready" in marks else None,
+        "app_import_ms": _ms(marks["app_import_start"], marks["app_imported"]) if "app_imported" in marks else None,
+        "app_construct_ms": _ms(marks["app_imported"], marks["app_constructed"]) if "app_constructed" in marks else None,
+        "app_first_paint_ms": _ms(marks["app_import_start"], marks["app_paint"]) if "app_paint" in marks else None,
+        "eager_modules": eager,
+    }
+    print(json.dumps(result))
+
+
+def run_once():
+    result = subprocess.run(
+        [sys.executable, __file__, "--child"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=dict(os.environ),
+        timeout=60
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(result.stderr.strip() or "Startup benchmark child failed.")
+    return json.loads(lines[-1])
+
+
+def summarize(runs):
+    summary = {}
+    for key, value in runs[0].items():
+        if not isinstance(value, (int, float)) and value is not None:
+            continue
+        values = [run[key] for run in runs if run[key] is not None]
+        if values:
+            summary[key] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+    summary["eager_modules"] = sorted({name for run in runs for name in run["eager_modules"]})
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure launcher and main window startup time.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--json", dest="json_path", help="write the results to this file")
+    parser.add_argument("--max-first-paint-ms", type=float, help="fail if the launcher first paint median is slower")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child()
+        return 0
+
+    runs = [run_once() for _ in range(max(1, args.runs))]
+    summary = summarize(runs)
+    report = {"benchmark": "startup", "runs": runs, "summary": summary}
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+    for key, stats in summary.items():
+        if key == "eager_modules":
+            continue
+        print(f"{key:26} median {stats['median']:8.1f}  min {stats['min']:8.1f}  max {stats['max']:8.1f}")
+    print(f"{'eager_modules':26} {', '.join(summary['eager_modules']) or 'none'}")
+
+    failed = False
+    if summary["eager_modules"]:
+        print("Heavy modules were imported before the launcher was shown.", file=sys.stderr)
+        failed = True
+    paint = summary.get("launcher_first_paint_ms")
+    if args.max_first_paint_ms and paint and paint["median"] > args.max_first_paint_ms:
+        print(f"Launcher first paint {paint['median']} ms exceeds {args.max_first_paint_ms} ms.", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import argparse
+import json
+import signal
+import sys
+import threading
+
+from resources.archive import DownloadArchive
+from resources.bandwidth import BandwidthScheduler, NIGHT_END, NIGHT_START, parse_rate
+from resources.core import DownloadCore, DEFAULT_WORKERS, EXTERNAL_DOWNLOADERS
+from resources.jobqueue import DONE
+from resources.jobspec import CUT_MODES, FAST_CUT, job_options
+from resources.jobstore import JobStore
+from resources.metrics import metrics
+from resources.postprocess import DEFAULT_POSTPROCESS_WORKERS
+from resources.server import DEFAULT_HOST, DEFAULT_PORT, JobService
+from resources.ytdlp_engine import ENGINES, SUBPROCESS
+
+
+def parse_hours(text):
+    start, end = text.split("-")
+    start, end = int(start), int(end)
+    if not (0 <= start < 24 and 0 <= end < 24):
+        raise ValueError(text)
+    return start, end
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Download videos with yt-dlp without the GUI.")
+    parser.add_argument("urls", nargs="*", help="video URLs to download")
+    parser.add_argument("-i", "--input", help="text file with one URL per line")
+    parser.add_argument("--jobs-file", help="JSON list or JSON lines file with job objects")
+    parser.add_argument("-o", "--output", default=".", help="download path (default: current directory)")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS, help="parallel downloads")
+    parser.add_argument("--cookies", default="None", help="browser to read cookies from")
+    parser.add_argument("--audio-only", action="store_true")
+    parser.add_argument("--audio-format", default="Default")
+    parser.add_argument("--audio-quality", default="Default")
+    parser.add_argument("--video-format", default="Default")
+    parser.add_argument("--video-quality", default="Default")
+    parser.add_argument("--section", dest="sections", action="append", default=[],
+                        help="download only START-END (hh:mm:ss or seconds); repeat for several clips")
+    parser.add_argument("--cut-mode", choices=CUT_MODES, default=FAST_CUT,
+                        help="fast cuts at keyframes without re-encoding, exact re-encodes for precise cuts")
+    parser.add_argument("--concurrent-fragments", type=int, default=1)
+    parser.add_argument("--http-chunk-size")
+    parser.add_argument("--external-downloader", choices=EXTERNAL_DOWNLOADERS)
+    parser.add_argument("--limit-rate", type=parse_rate, help="total bandwidth shared by all jobs, e.g. 5M")
+    parser.add_argument("--night-limit-rate", type=parse_rate, help="total bandwidth during night hours")
+    parser.add_argument("--night-hours", type=parse_hours, default=(NIGHT_START, NIGHT_END),
+                        help=f"night hours as START-END (default: {NIGHT_START}-{NIGHT_END})")
+    parser.add_argument("--custom-arg", help="extra yt-dlp arguments")
+    parser.add_argument("--engine", choices=ENGINES, default=SUBPROCESS)
+    parser.add_argument("--postprocess-workers", type=int, default=DEFAULT_POSTPROCESS_WORKERS,
+                        help=f"parallel ffmpeg merge/extract jobs (default: {DEFAULT_POSTPROCESS_WORKERS})")
+    parser.add_argument("--inline-postprocess", action="store_true",
+                        help="let yt-dlp merge and extract inside the download slot")
+    parser.add_argument("--yt-dlp", dest="yt_dlp_path", help="path to the yt-dlp executable")
+    parser.add_argument("--ffmpeg-dir", help="directory containing ffmpeg")
+    parser.add_argument("-v", "--verbose", action="store_true", help="copy yt-dlp output to stderr")
+    parser.add_argument("--archive", help="download archive file; videos listed in it are skipped")
+    parser.add_argument("--store", help="SQLite job store; interrupted jobs in it are resumed")
+    parser.add_argument("--metrics-file", help="write Prometheus text metrics to this file as jobs finish")
+    parser.add_argument("--serve", action="store_true", help="run the local job submission API")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--token", help="bearer token required on API requests (default: a random token)")
+    parser.add_argument("--api-custom-args", action="store_true",
+                        help="accept custom yt-dlp arguments from API clients")
+    return parser.parse_args(argv)
+
+
+def load_jobs(args):
+    defaults = {
+        "cookies": args.cookies,
+        "audio_only": args.audio_only,
+        "audio_format": args.audio_format,
+        "audio_quality": args.audio_quality,
+        "video_format": args.video_format,
+        "video_quality": args.video_quality,
+        "sections": ",".join(args.sections),
+        "cut_mode": args.cut_mode,
+        "concurrent_fragments": args.concurrent_fragments,
+        "http_chunk_size": args.http_chunk_size,
+        "external_downloader": args.external_downloader,
+        "custom_arg": args.custom_arg,
+        "engine": args.engine,
+        "pipeline": not args.inline_postprocess,
+    }
+    urls = list(args.urls)
+    if args.input:
+        with open(args.input, "r", encoding="utf-8") as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    jobs = [dict(defaults, url=url) for url in urls]
+
+    if args.jobs_file:
+        with open(args.jobs_file, "r", encoding="utf-8") as f:
+            text = f.read().strip()
+        if text.startswith("["):
+            entries = json.loads(text)
+        else:
+            entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"url": entry}
+            jobs.append(dict(defaults, **entry))
+    return jobs
+
+
+def make_core(args):
+    if args.metrics_file:
+        metrics.set_path(args.metrics_file)
+    store = JobStore(args.store) if args.store else None
+    archive = DownloadArchive(args.archive) if args.archive else None
+    bandwidth = BandwidthScheduler(args.limit_rate, args.night_limit_rate, *args.night_hours)
+    return DownloadCore(
+        workers=args.workers, yt_dlp_path=args.yt_dlp_path, ffmpeg_dir=args.ffmpeg_dir,
+        store=store, archive=archive, bandwidth=bandwidth, postprocess_workers=args.postprocess_workers
+    )
+
+
+def serve(args, jobs):
+    core = make_core(args)
+    core.restore()
+    service = JobService(
+        core, default_path=args.output, token=args.token, allow_custom_args=args.api_custom_args
+    )
+    httpd = service.bind(args.host, args.port, args.socket)
+    for spec in jobs:
+        try:
+            service.submit(spec, trusted=True)
+        except ValueError as e:
+            print(f"Rejected {spec.get('url')}: {e}", file=sys.stderr)
+    where = args.socket or "http://%s:%d" % httpd.server_address[:2]
+    print(f"Listening on {where}", file=sys.stderr)
+    if service.token:
+        print(f"API token: {service.token}", file=sys.stderr)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+        core.shutdown(keep_pending=True)
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = load_jobs(args)
+    if args.serve:
+        return serve(args, jobs)
+
+    core = make_core(args)
+    output_lock = threading.Lock()
+    changed = threading.Event()
+    interrupted = threading.Event()
+    submitted = []
+
+    def emit(event):
+        line = json.dumps(event)
+        with output_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def on_job(job):
+        emit(dict(job.to_dict(), event="job"))
+        changed.set()
+
+    def on_interrupt(*_):
+        interrupted.set()
+        changed.set()
+
+    core.add_listener(on_job)
+    signal.signal(signal.SIGINT, on_interrupt)
+    submitted += core.restore()
+    if not jobs and not submitted:
+        print("No URLs given.", file=sys.stderr)
+        core.shutdown()
+        return 2
+
+    rejected = skipped = 0
+    for spec in jobs:
+        spec = dict(spec)
+        url = spec.pop("url", "")
+        download_path = spec.pop("download_path", args.output)
+        try:
+            options = job_options(spec)
+            key = options.get("skip_archived", True) and core.archived(url, cookies=options.get("cookies"))
+            if key:
+                skipped += 1
+                emit({"event": "skipped", "url": url, "archive_id": key})
+                continue
+            submitted.append(core.download_video(url, download_path, **options))
+        except ValueError as e:
+            rejected += 1
+            emit({"event": "rejected", "url": url, "message": str(e)})
+
+    while not interrupted.is_set() and not all(j.finished for j in submitted):
+        changed.wait(0.2)
+        changed.clear()
+        if args.verbose:
+            lines, _ = core.console.drain()
+            if lines:
+                with output_lock:
+                    sys.stderr.write("\n".join(lines) + "\n")
+    if args.verbose:
+        lines, _ = core.console.drain()
+        if lines:
+            sys.stderr.write("\n".join(lines) + "\n")
+
+    core.shutdown(keep_pending=interrupted.is_set())
+    failed = [j for j in submitted if j.state != DONE]
+    emit({"event": "summary", "submitted": len(submitted), "done": len(submitted) - len(failed),
+          "failed": len(failed), "rejected": rejected, "skipped": skipped, "metrics": core.metrics.summary()})
+    return 1 if failed or rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
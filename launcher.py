@@ -1,12 +1,11 @@
 import sys
+import time
 from pathlib import Path
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QProgressBar, QApplication
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 
-from app import VideoDownloaderGUI
 from resources.notifications import PopupManager
-from resources.reqdownloader import DependencyManager
 
 HERE = Path(__file__).parent
 DATA_DIR = HERE / "data"
@@ -23,29 +22,17 @@ class Launcher(QWidget):
         self.setFixedSize(680, 300)
         self.setStyleSheet("background-color: #121212;")
 
-        top_row = QHBoxLayout()
-        icon_label = QLabel()
-        icon_path = self.resource_path("icon.ico")
-        if icon_path.exists():
-            icon_label.setPixmap(QPixmap(str(icon_path)).scaled(48, 48, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
         self.popup = PopupManager(self)
-        self.deps = DependencyManager(
-            self.popup,
-            requirements_dir=REQUIREMENTS_DIR,
-            json_path=DATA_DIR / "version_info.json"
-        )
-
+        self.deps = None
+        self.deps_scheduled = False
+        self.states = {}
+        self.window = None
         self.downloading = False
-
-        self.deps.signals.progress.connect(self.on_progress)
-        self.deps.signals.finished.connect(self.on_op_finished_wrapper)
-        self.deps.signals.info.connect(self.show_info_popup_wrapper)
-        self.deps.signals.error.connect(self.show_error_popup_wrapper)
+        self.active_ops = 0
 
         top_row = QHBoxLayout()
         icon_label = QLabel()
-        icon_path = HERE / "icon.ico"
+        icon_path = self.resource_path("icon.ico")
         if icon_path.exists():
             icon_label.setPixmap(QPixmap(str(icon_path)).scaled(48, 48, Qt.KeepAspectRatio, Qt.SmoothTransformation))
 
@@ -68,7 +55,8 @@ class Launcher(QWidget):
         ff_label.setMinimumWidth(90)
         self.ff_progress = QProgressBar()
         self.ff_progress.setValue(0)
-        self.ff_button = QPushButton("Install")
+        self.ff_button = QPushButton("Checking...")
+        self.ff_button.setEnabled(False)
         self.ff_button.setFixedWidth(140)
         self.ff_button.clicked.connect(lambda: self.on_dep_clicked("ffmpeg"))
         ff_row.addWidget(ff_label)
@@ -80,45 +68,111 @@ class Launcher(QWidget):
         yt_label.setMinimumWidth(90)
         self.yt_progress = QProgressBar()
         self.yt_progress.setValue(0)
-        self.yt_button = QPushButton("Install")
+        self.yt_button = QPushButton("Checking...")
+        self.yt_button.setEnabled(False)
         self.yt_button.setFixedWidth(140)
         self.yt_button.clicked.connect(lambda: self.on_dep_clicked("yt-dlp"))
         yt_row.addWidget(yt_label)
         yt_row.addWidget(self.yt_progress, stretch=1)
         yt_row.addWidget(self.yt_button)
 
+        self.last_checked_label = QLabel("")
+        self.last_checked_label.setObjectName("subtitle")
+
+        self.check_all_btn = QPushButton("Check all")
+        self.check_all_btn.setEnabled(False)
+        self.check_all_btn.setFixedWidth(140)
+        self.check_all_btn.clicked.connect(self.on_check_all)
         self.launch_btn = QPushButton("Launch")
+        self.launch_btn.setEnabled(False)
         self.launch_btn.setFixedWidth(140)
         self.launch_btn.clicked.connect(self.on_launch)
+        buttons_row = QHBoxLayout()
+        buttons_row.addStretch()
+        buttons_row.addWidget(self.check_all_btn)
+        buttons_row.addWidget(self.launch_btn)
+        buttons_row.addStretch()
 
         layout = QVBoxLayout()
         layout.addLayout(top_row)
         layout.addSpacing(18)
         layout.addLayout(ff_row)
         layout.addLayout(yt_row)
+        layout.addWidget(self.last_checked_label, alignment=Qt.AlignRight)
         layout.addStretch()
-        layout.addWidget(self.launch_btn, alignment=Qt.AlignCenter)
+        layout.addLayout(buttons_row)
         layout.addSpacing(10)
 
         self.setLayout(layout)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.deps_scheduled:
+            self.deps_scheduled = True
+            QTimer.singleShot(0, self.init_dependencies)
+
+    def init_dependencies(self):
+        from resources.connectivity import connectivity
+        from resources.reqdownloader import DependencyManager
+
+        self.deps = DependencyManager(
+            self.popup,
+            requirements_dir=REQUIREMENTS_DIR,
+            json_path=DATA_DIR / "version_info.json"
+        )
+        connectivity.refresh()
+
+        self.deps.signals.progress.connect(self.on_progress)
+        self.deps.signals.finished.connect(self.on_op_finished_wrapper)
+        self.deps.signals.done.connect(self.on_op_done)
+        self.deps.signals.info.connect(self.show_info_popup_wrapper)
+        self.deps.signals.error.connect(self.show_error_popup_wrapper)
+        self.deps.signals.requirements.connect(self.apply_requirements)
         self.update_buttons_state()
+        self.update_last_checked()
 
     def show_info_popup_wrapper(self, message):
+        self.update_last_checked()
         self.popup.show_info(message)
 
     def show_error_popup_wrapper(self, message):
         self.popup.show_error(message)
 
     def on_op_finished_wrapper(self, name, success, message):
+        from resources.connectivity import connectivity
+
         self.downloading = False
-        self.update_buttons_state()
+        connectivity.refresh()
+        self.update_last_checked()
         if success:
             self.popup.show_success(f"{name} {message}")
         else:
             self.popup.show_error(f"{name} {message}")
 
+    def begin_op(self):
+        self.active_ops += 1
+        for btn in (self.ff_button, self.yt_button, self.check_all_btn, self.launch_btn):
+            btn.setEnabled(False)
+
+    def on_op_done(self, name):
+        self.active_ops = max(0, self.active_ops - 1)
+        if not self.active_ops:
+            self.update_buttons_state()
+
     def update_buttons_state(self):
-        states = self.deps.check_existing_requirements()
+        self.deps.refresh_requirements()
+
+    def update_last_checked(self):
+        checked_at = self.deps.last_checked()
+        if checked_at:
+            self.last_checked_label.setText(f"Last checked: {time.strftime('%Y-%m-%d %H:%M', time.localtime(checked_at))}")
+
+    def apply_requirements(self, states):
+        self.states = states
+        idle = not self.active_ops
+        self.ff_button.setEnabled(idle)
+        self.yt_button.setEnabled(idle)
+        self.check_all_btn.setEnabled(idle and bool(states.get("ffmpeg") or states.get("yt-dlp")))
         if states.get("ffmpeg"):
             self.ff_button.setText("Check Update")
             self.ff_progress.setValue(0)
@@ -132,20 +186,34 @@ class Launcher(QWidget):
             self.yt_button.setText("Install")
             self.yt_progress.setValue(0)
 
-        if states.get("ffmpeg") and states.get("yt-dlp"):
+        if idle and states.get("ffmpeg") and states.get("yt-dlp"):
             self.launch_btn.setEnabled(True)
         else:
             self.launch_btn.setEnabled(False)
 
     def on_dep_clicked(self, name):
+        if self.deps is None:
+            return
         btn = self.ff_button if name == "ffmpeg" else self.yt_button
         progress = self.ff_progress if name == "ffmpeg" else self.yt_progress
 
+        self.begin_op()
         if btn.text().lower() == "install":
             self.deps.install_dependency(name, progress, btn)
         else:
             self.deps.check_update_dependency(name, progress, btn)
 
+    def on_check_all(self):
+        targets = {}
+        if self.states.get("ffmpeg"):
+            targets["ffmpeg"] = (self.ff_progress, self.ff_button)
+        if self.states.get("yt-dlp"):
+            targets["yt-dlp"] = (self.yt_progress, self.yt_button)
+        if targets:
+            for _ in targets:
+                self.begin_op()
+            self.deps.check_all_dependencies(targets)
+
     def on_progress(self, name, pct):
         if name == "ffmpeg":
             self.ff_progress.setValue(pct)
@@ -154,6 +222,8 @@ class Launcher(QWidget):
 
     def on_launch(self):
         try:
+            from app import VideoDownloaderGUI
+
             self.window = VideoDownloaderGUI(self.resource_path)
             self.window.show()
             self.close()
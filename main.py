@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QFontDatabase, QIcon
@@ -12,14 +13,7 @@ def resource_path(relative_path):
 
 HERE = Path(__file__).parent
 
-app = QApplication(sys.argv)
-
-QFontDatabase.addApplicationFont(str(resource_path("fonts/Montserrat-Bold.ttf")))
-QFontDatabase.addApplicationFont(str(resource_path("fonts/Montserrat-ExtraBold.ttf")))
-
-app.setWindowIcon(QIcon(str(resource_path("icon.ico"))))
-
-app.setStyleSheet("""
+STYLESHEET = """
 QWidget {
     background-color: #121212;
     color: #ffffff;
@@ -66,7 +60,7 @@ QComboBox:disabled, QCheckBox:disabled, QLineEdit:disabled {
     background-color: #2b2b2b;
     color: #777777;
 }
-QTextEdit {
+QTextEdit, QPlainTextEdit {
     background-color: #121212;
     color: #ffffff;
 }
@@ -78,8 +72,20 @@ QScrollBar::handle:vertical {
     background: green;
     min-height: 20px;
 }
-""")
+"""
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    app = QApplication(sys.argv)
+
+    QFontDatabase.addApplicationFont(str(resource_path("fonts/Montserrat-Bold.ttf")))
+    QFontDatabase.addApplicationFont(str(resource_path("fonts/Montserrat-ExtraBold.ttf")))
+
+    app.setWindowIcon(QIcon(str(resource_path("icon.ico"))))
+
+    app.setStyleSheet(STYLESHEET)
 
-window = Launcher(resource_path)
-window.show()
-sys.exit(app.exec())
\ No newline at end of file
+    window = Launcher(resource_path)
+    window.show()
+    sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,122 @@
+import re
+import shutil
+import threading
+from pathlib import Path
+
+ARCHIVE_PATH = Path(__file__).parent.parent / "data" / "archive.txt"
+
+URL_PATTERNS = (
+    ("youtube", re.compile(r"(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/|v/)|youtu\.be/)([0-9A-Za-z_-]{11})")),
+    ("vimeo", re.compile(r"vimeo\.com/(?:video/)?(\d+)(?:[/?#]|$)")),
+    ("dailymotion", re.compile(r"dailymotion\.com/video/([0-9A-Za-z]+)")),
+)
+
+
+def archive_key(extractor, video_id):
+    return f"{extractor.lower()} {video_id}"
+
+
+def key_from_info(info):
+    if not info:
+        return None
+    extractor = info.get("extractor_key") or info.get("ie_key")
+    video_id = info.get("id")
+    if not extractor or not video_id:
+        return None
+    return archive_key(extractor, video_id)
+
+
+def key_from_url(url):
+    for extractor, pattern in URL_PATTERNS:
+        match = pattern.search(url or "")
+        if match:
+            return archive_key(extractor, match.group(1))
+    return None
+
+
+class DownloadArchive:
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._offset = 0
+        self._loaded = False
+
+    def refresh(self):
+        with self._lock:
+            self._loaded = True
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(0, 2)
+                    size = f.tell()
+                    if size < self._offset:
+                        self._keys.clear()
+                        self._offset = 0
+                    f.seek(self._offset)
+                    data = f.read()
+            except OSError:
+                return
+            end = data.rfind(b"\n") + 1
+            if not end:
+                return
+            self._offset += end
+            text = data[:end].decode("utf-8", errors="replace")
+            self._keys.update(text.splitlines())
+            self._keys.discard("")
+
+    def __contains__(self, key):
+        if not self._loaded:
+            self.refresh()
+        return key in self._keys
+
+    def __len__(self):
+        if not self._loaded:
+            self.refresh()
+        return len(self._keys)
+
+    def pending_path(self, job_id):
+        return self.path.with_name(f"{self.path.name}.{job_id}.pending")
+
+    def snapshot(self, pending):
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists():
+                    shutil.copyfile(self.path, pending)
+                else:
+                    Path(pending).write_bytes(b"")
+            except OSError:
+                return False
+        return True
+
+    def commit(self, pending):
+        try:
+            text = Path(pending).read_text(encoding="utf-8")
+        except OSError:
+            return []
+        keys = [archive_key(*line.split(None, 1)) for line in text.splitlines() if len(line.split(None, 1)) == 2]
+        self.refresh()
+        with self._lock:
+            new = [key for key in dict.fromkeys(keys) if key not in self._keys]
+            if new:
+                try:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(new) + "\n")
+                except OSError:
+                    return []
+                self._keys.update(new)
+        self.discard(pending)
+        return new
+
+    def discard(self, pending):
+        try:
+            Path(pending).unlink()
+        except OSError:
+            pass
+
+    def match(self, url, info=None):
+        key = key_from_info(info) or key_from_url(url)
+        if key and key in self:
+            return key
+        return None
@@ -0,0 +1,72 @@
+import re
+import threading
+import time
+
+RATE_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?$", re.IGNORECASE)
+RATE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+NIGHT_START = 23
+NIGHT_END = 7
+MIN_RATE = 64 * 1024
+MAX_PRIORITY_WEIGHT = 8
+
+
+def parse_rate(text):
+    if text is None or not str(text).strip():
+        return None
+    match = RATE_RE.match(str(text).strip())
+    if not match:
+        raise ValueError("Bandwidth limit must look like 500K, 5M or 1.5M.")
+    rate = int(float(match.group(1)) * RATE_UNITS[match.group(2).upper()])
+    return rate or None
+
+
+def format_rate(rate):
+    if not rate:
+        return "unlimited"
+    value = float(rate)
+    for unit in ("B", "KiB", "MiB"):
+        if value < 1024:
+            return f"{value:.0f}{unit}/s" if unit == "B" else f"{value:.1f}{unit}/s"
+        value /= 1024
+    return f"{value:.1f}GiB/s"
+
+
+def priority_weight(priority):
+    return min(MAX_PRIORITY_WEIGHT, 2 ** max(0, int(priority or 0)))
+
+
+class BandwidthScheduler:
+    def __init__(self, day_limit=None, night_limit=None, night_start=NIGHT_START, night_end=NIGHT_END, clock=time.localtime):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.configure(day_limit, night_limit, night_start, night_end)
+
+    def configure(self, day_limit=None, night_limit=None, night_start=NIGHT_START, night_end=NIGHT_END):
+        with self._lock:
+            self.day_limit = day_limit or None
+            self.night_limit = night_limit or None
+            self.night_start = int(night_start) % 24
+            self.night_end = int(night_end) % 24
+
+    def is_night(self):
+        hour = self.clock().tm_hour
+        if self.night_start == self.night_end:
+            return False
+        if self.night_start < self.night_end:
+            return self.night_start <= hour < self.night_end
+        return hour >= self.night_start or hour < self.night_end
+
+    def budget(self):
+        with self._lock:
+            if self.night_limit is not None and self.is_night():
+                return self.night_limit
+            return self.day_limit
+
+    def shares(self, jobs):
+        budget = self.budget()
+        if not budget:
+            return {job.id: None for job in jobs}
+        weights = {job.id: priority_weight(job.priority) for job in jobs}
+        total = sum(weights.values())
+        return {job_id: max(MIN_RATE, budget * weight // total) for job_id, weight in weights.items()}
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import requests
+
+from resources.httpclient import client
+
+CHECK_URLS = ("https://www.google.com", "https://api.github.com")
+DEFAULT_TTL = 120
+OFFLINE_TTL = 10
+
+NETWORK_ERROR_MARKERS = (
+    "Failed to resolve",
+    "getaddrinfo failed",
+    "Temporary failure in name resolution",
+    "Name or service not known",
+    "Network is unreachable",
+    "No route to host",
+)
+
+
+def is_network_error(text):
+    return any(marker in text for marker in NETWORK_ERROR_MARKERS)
+
+
+class ConnectivityMonitor:
+    def __init__(self, urls=CHECK_URLS, ttl=DEFAULT_TTL, offline_ttl=OFFLINE_TTL, timeout=5):
+        self.urls = urls
+        self.ttl = ttl
+        self.offline_ttl = offline_ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._online = None
+        self._checked_at = 0.0
+        self._refreshing = False
+
+    def _is_fresh(self):
+        ttl = self.ttl if self._online else self.offline_ttl
+        return time.monotonic() - self._checked_at < ttl
+
+    def is_online(self, block=False):
+        with self._lock:
+            state = self._online
+            fresh = state is not None and self._is_fresh()
+        if state is None and block:
+            return self.check()
+        if not fresh:
+            self.refresh()
+        return state is not False
+
+    def refresh(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.check, daemon=True).start()
+
+    def check(self):
+        online = False
+        for url in self.urls:
+            try:
+                client.head(url, timeout=self.timeout, retry=False)
+                online = True
+                break
+            except requests.RequestException:
+                continue
+        self._set(online)
+        return online
+
+    def mark_online(self):
+        self._set(True)
+
+    def mark_offline(self):
+        self._set(False)
+        self.refresh()
+
+    def _set(self, online):
+        with self._lock:
+            self._online = online
+            self._checked_at = time.monotonic()
+            self._refreshing = False
+
+
+connectivity = ConnectivityMonitor()
@@ -0,0 +1,57 @@
+import threading
+from collections import deque
+from pathlib import Path
+
+DEFAULT_SCROLLBACK = 5000
+
+
+class ConsoleBuffer:
+    def __init__(self, scrollback=DEFAULT_SCROLLBACK, log_path=None):
+        self.scrollback = max(1, int(scrollback))
+        self.log_path = Path(log_path) if log_path else None
+        self._lock = threading.Lock()
+        self._pending = deque(maxlen=self.scrollback)
+        self._unwritten = []
+        self._dropped = 0
+        if self.log_path:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self.log_path.write_text("", encoding="utf-8")
+            except OSError:
+                self.log_path = None
+
+    def append(self, line):
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(line)
+            if self.log_path:
+                self._unwritten.append(line)
+
+    def set_scrollback(self, scrollback):
+        with self._lock:
+            self.scrollback = max(1, int(scrollback))
+            self._pending = deque(self._pending, maxlen=self.scrollback)
+
+    def drain(self):
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        self._write_log()
+        return lines, dropped
+
+    def _write_log(self):
+        with self._lock:
+            unwritten, self._unwritten = self._unwritten, []
+        if not unwritten:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(unwritten) + "\n")
+        except OSError:
+            pass
+
+    def flush(self):
+        if self.log_path:
+            self._write_log()
@@ -0,0 +1,668 @@
+import functools
+import itertools
+import math
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+import validators
+
+from resources.bandwidth import BandwidthScheduler, format_rate
+from resources.connectivity import connectivity, is_network_error
+from resources.console import ConsoleBuffer
+from resources.formatplan import plan_formats, sort_hint
+from resources.jobspec import EXACT_CUT, JobSpec, format_command, job_path
+from resources.jobqueue import DownloadJob, DownloadQueue, PROCESSING, RUNNING
+from resources.metrics import metrics as default_metrics
+from resources.postprocess import (
+    DEFAULT_POSTPROCESS_WORKERS, FORMAT_SUFFIX_RE, PIPELINE_SECTION_TEMPLATE, PIPELINE_TEMPLATE, PostProcessPool
+)
+from resources.probe import ProbeCache, expand_playlist, run_probe
+from resources.progress import PROGRESS_ARGS, ProgressThrottle, parse_progress_line
+from resources.ytdlp_engine import InProcessEngine, IN_PROCESS, SUBPROCESS, is_available as in_process_available
+
+FFMPEG_PATH = Path(__file__).parent.parent / "data" / "requirements"
+YT_DLP_PATH = FFMPEG_PATH / ("yt-dlp.exe" if os.name == "nt" else "yt-dlp")
+
+DEFAULT_WORKERS = 2
+DEFAULT_PLAYLIST_LIMIT = 2
+MAX_CONCURRENT_FRAGMENTS = 32
+EXTERNAL_DOWNLOADERS = ["aria2c", "axel", "curl", "wget"]
+REBALANCE_RATIO = 1.5
+REBALANCE_INTERVAL = 10
+CHUNK_SIZE_RE = re.compile(r"^\d+(\.\d+)?[KMG]?$", re.IGNORECASE)
+TIME_RE = re.compile(r"^(?:(\d+):)?(?:(\d+):)?(\d+(?:\.\d+)?)$")
+SECTION_SPLIT_RE = re.compile(r"[,;\n]+")
+SECTION_TEMPLATE = "%(title)s [%(id)s] %(section_start)ds.%(ext)s"
+INLINE_POSTPROCESS_ARGS = {
+    "-f", "--format", "-x", "--extract-audio", "-o", "--output", "-k", "--keep-video",
+    "--merge-output-format", "--remux-video", "--recode-video", "--exec", "--print", "-O",
+}
+
+
+def executable_name(name):
+    return f"{name}.exe" if os.name == "nt" else name
+
+
+def find_external_downloader(name):
+    local = FFMPEG_PATH / executable_name(name)
+    if local.exists():
+        return str(local)
+    return shutil.which(name)
+
+
+def validate_transfer_options(concurrent_fragments=1, http_chunk_size=None, external_downloader=None):
+    try:
+        fragments = int(concurrent_fragments or 1)
+    except (TypeError, ValueError):
+        return "Concurrent fragments must be a number."
+    if not 1 <= fragments <= MAX_CONCURRENT_FRAGMENTS:
+        return f"Concurrent fragments must be between 1 and {MAX_CONCURRENT_FRAGMENTS}."
+    if http_chunk_size and not CHUNK_SIZE_RE.match(http_chunk_size):
+        return "Chunk size must look like 10M, 512K or 1G."
+    if external_downloader and external_downloader.lower() != "default":
+        if external_downloader not in EXTERNAL_DOWNLOADERS:
+            return f"Unsupported downloader: {external_downloader}."
+        if not find_external_downloader(external_downloader):
+            return f"{external_downloader} was not found."
+    return None
+
+
+def transfer_args(concurrent_fragments=1, http_chunk_size=None, external_downloader=None):
+    args = []
+    fragments = int(concurrent_fragments or 1)
+    if fragments > 1:
+        args += ["-N", str(fragments)]
+    if http_chunk_size:
+        args += ["--http-chunk-size", http_chunk_size.upper()]
+    if external_downloader and external_downloader.lower() != "default":
+        args += ["--downloader", find_external_downloader(external_downloader) or external_downloader]
+        if external_downloader == "aria2c":
+            connections = max(fragments, 4)
+            args += ["--downloader-args", f"aria2c:-x {connections} -s {connections} -k 1M"]
+    return args
+
+
+def parse_time(text):
+    text = text.strip()
+    if text.lower() == "inf":
+        return math.inf
+    match = TIME_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid time {text!r}, use hh:mm:ss or seconds.")
+    seconds = 0.0
+    for part in match.groups():
+        if part is not None:
+            seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_time(seconds):
+    if seconds == math.inf:
+        return "inf"
+    return f"{seconds:.3f}".rstrip("0").rstrip(".")
+
+
+@functools.lru_cache(maxsize=256)
+def parse_sections(frag_from="", frag_to="", sections=""):
+    texts = [f"{frag_from}-{frag_to}"] if frag_from and frag_to else []
+    texts += [part.strip() for part in SECTION_SPLIT_RE.split(sections or "") if part.strip()]
+    ranges = []
+    for text in texts:
+        start, sep, end = text.partition("-")
+        if not sep:
+            raise ValueError(f"Section {text!r} must look like 1:00-1:30.")
+        start, end = parse_time(start), parse_time(end)
+        if end <= start:
+            raise ValueError(f"Section {text!r} ends before it starts.")
+        ranges.append((start, end))
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+def validate_sections(frag_from="", frag_to="", sections=""):
+    if bool(frag_from) != bool(frag_to):
+        return "Fill in both ends of the fragment."
+    try:
+        parse_sections(frag_from, frag_to, sections)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def section_args(spec):
+    ranges = parse_sections(spec.frag_from, spec.frag_to, spec.sections)
+    args = []
+    for start, end in ranges:
+        args += ["--download-sections", f"*{format_time(start)}-{format_time(end)}"]
+    if ranges and spec.cut_mode == EXACT_CUT:
+        args.append("--force-keyframes-at-cuts")
+    return args
+
+
+def split_custom_args(custom_arg):
+    if not custom_arg:
+        return []
+    try:
+        return shlex.split(custom_arg, posix=os.name != "nt")
+    except ValueError:
+        return custom_arg.split()
+
+
+def overrides_format(spec):
+    args = {arg.split("=", 1)[0] for arg in split_custom_args(spec.custom_arg)}
+    return bool(args & INLINE_POSTPROCESS_ARGS)
+
+
+def uses_pipeline(spec):
+    return spec.pipeline and "live" not in spec.url.lower() and not overrides_format(spec)
+
+
+def sort_args(spec):
+    fields = []
+    if not spec.audio_only and spec.video_quality.lower() != "default":
+        fields.append(f"res:{spec.video_quality.replace('p', '')}")
+    hint = sort_hint(spec)
+    if hint:
+        fields.append(hint)
+    return ["-S", ",".join(fields)] if fields else []
+
+
+@functools.lru_cache(maxsize=256)
+def build_argv(spec, yt_dlp_path, ffmpeg_dir, archive_path=None, info_path=None, rate=None):
+    cmd = [
+        yt_dlp_path,
+        "--no-playlist",
+        "--continue",
+        "-P", spec.download_path,
+        "--ffmpeg-location", str(Path(ffmpeg_dir) / executable_name("ffmpeg")),
+        *PROGRESS_ARGS
+    ]
+
+    if spec.cookies and spec.cookies.lower() != "none":
+        cmd += ["--cookies-from-browser", spec.cookies.lower()]
+    sections = section_args(spec)
+    cmd += sections
+
+    is_live = "live" in spec.url.lower()
+
+    if uses_pipeline(spec):
+        if spec.format_ids:
+            cmd += ["-f", spec.format_ids.replace("+", ",")]
+        else:
+            cmd += ["-f", "ba/b" if spec.audio_only else "bv,ba", *sort_args(spec)]
+        cmd += ["-o", PIPELINE_SECTION_TEMPLATE if sections else PIPELINE_TEMPLATE]
+    elif not is_live:
+        if sections and not overrides_format(spec):
+            cmd += ["-o", SECTION_TEMPLATE]
+        if spec.audio_only:
+            cmd += ["-f", spec.format_ids] if spec.format_ids else sort_args(spec)
+            cmd.append("-x")
+            if spec.audio_format.lower() != "default":
+                cmd += ["--audio-format", spec.audio_format.lower()]
+            if spec.audio_quality.lower() != "default":
+                cmd += ["--audio-quality", spec.audio_quality.replace("kbps", "K")]
+        else:
+            cmd += ["-f", spec.format_ids or "bv+ba"]
+            if not spec.format_ids:
+                cmd += sort_args(spec)
+            if spec.video_format.lower() != "default":
+                cmd += ["--merge-output-format", spec.video_format.lower()]
+
+    cmd += transfer_args(spec.concurrent_fragments, spec.http_chunk_size, spec.external_downloader)
+    if rate:
+        cmd += ["-r", str(rate)]
+    if archive_path:
+        cmd += ["--download-archive", archive_path]
+    cmd += split_custom_args(spec.custom_arg)
+    if info_path:
+        cmd += ["--load-info-json", info_path]
+    else:
+        cmd.append(spec.url)
+    return tuple(cmd)
+
+
+class DownloadCore:
+    def __init__(self, console=None, workers=DEFAULT_WORKERS, yt_dlp_path=None, ffmpeg_dir=None, probe_cache=None, store=None, archive=None, bandwidth=None, postprocess_workers=DEFAULT_POSTPROCESS_WORKERS, metrics=None):
+        self.console = console if console is not None else ConsoleBuffer()
+        self.yt_dlp_path = Path(yt_dlp_path) if yt_dlp_path else YT_DLP_PATH
+        self.ffmpeg_dir = Path(ffmpeg_dir) if ffmpeg_dir else FFMPEG_PATH
+        self.queue = DownloadQueue(self.run_job, workers=workers, listener=self._notify)
+        self.postprocess = PostProcessPool(
+            self.ffmpeg_dir / executable_name("ffmpeg"), self.ffmpeg_dir / executable_name("ffprobe"),
+            self.console, postprocess_workers
+        )
+        self.engine = None
+        self._listeners = []
+        self._playlist_ids = itertools.count(1)
+        self.store = store
+        self.archive = archive
+        self.bandwidth = bandwidth if bandwidth is not None else BandwidthScheduler()
+        self._rate_lock = threading.Lock()
+        self._rates = {}
+        self._budget = self.bandwidth.budget()
+        if store is not None:
+            DownloadJob.reserve_ids(store.max_id())
+            self.add_listener(store.record)
+        self.metrics = metrics if metrics is not None else default_metrics
+        self.add_listener(self._record_metrics)
+        self.probe_cache = probe_cache if probe_cache is not None else ProbeCache()
+        threading.Thread(target=self.probe_cache.purge_expired, daemon=True).start()
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, job):
+        if (job.state == RUNNING) != (job.id in self._rates) or self.bandwidth.budget() != self._budget:
+            self.rebalance()
+        elif job.state == RUNNING and self._rates.get(job.id, job.rate) != job.rate:
+            self._apply_rate(job, self._rates.get(job.id))
+        for listener in self._listeners:
+            listener(job)
+
+    def restore(self):
+        if self.store is None:
+            return []
+        jobs = []
+        for row in self.store.interrupted():
+            if self.queue.get(row["id"]) is not None:
+                continue
+            spec = JobSpec.from_options(row["url"], row["download_path"], row["options"])
+            job = DownloadJob(
+                row["url"], spec.download_path, options=row["options"], priority=row["priority"],
+                title=row["title"], group=row["group"], job_id=row["id"]
+            )
+            job.spec = spec
+            job.files = set(row["files"])
+            if row["state"] == PROCESSING and uses_pipeline(spec):
+                job.outputs = [
+                    name for name in sorted(job.files)
+                    if FORMAT_SUFFIX_RE.search(Path(name).stem) and job_path(spec.download_path, name).exists()
+                ]
+            jobs.append(self.queue.submit(job))
+        return jobs
+
+    def rebalance(self):
+        with self._rate_lock:
+            self._budget = self.bandwidth.budget()
+            running = [job for job in self.queue.jobs() if job.state == RUNNING]
+            self._rates = self.bandwidth.shares(running)
+        for job in running:
+            if job.process is not None:
+                self._apply_rate(job, self._rates.get(job.id))
+
+    def _apply_rate(self, job, rate):
+        if rate == job.rate or job.process is None or job.cancel_requested:
+            return
+        if not isinstance(job.process, subprocess.Popen):
+            job.process.set_rate(rate)
+            job.rate = rate
+            return
+        if job.restart_requested or time.monotonic() - job.rate_since < REBALANCE_INTERVAL:
+            return
+        if job.rate and rate and max(job.rate, rate) < REBALANCE_RATIO * min(job.rate, rate):
+            return
+        if job.record is not None and (job.record.stage != "download" or job.record.status != "downloading"):
+            return
+        job.restart_requested = True
+        try:
+            job.process.terminate()
+        except Exception:
+            job.restart_requested = False
+
+    def set_bandwidth(self, day_limit=None, night_limit=None, night_start=None, night_end=None):
+        bandwidth = self.bandwidth
+        bandwidth.configure(
+            day_limit, night_limit,
+            bandwidth.night_start if night_start is None else night_start,
+            bandwidth.night_end if night_end is None else night_end
+        )
+        self.rebalance()
+
+    def clear_finished(self):
+        removed = self.queue.clear_finished()
+        if self.store is not None:
+            self.store.forget(job.id for job in removed)
+        return removed
+
+    def validate_input(self, url: str, download_path: str):
+        if not url:
+            return "No link provided."
+        if not validators.url(url):
+            return "The link provided is not valid."
+        if not download_path:
+            return "No download path provided."
+        if not connectivity.is_online():
+            return "No internet connection."
+        return None
+
+    def probe(self, url: str, cookies=None):
+        if not url:
+            raise ValueError("No link provided.")
+        if not validators.url(url):
+            raise ValueError("The link provided is not valid.")
+        return run_probe(self.yt_dlp_path, url, cookies, cache=self.probe_cache)
+
+    def expand_playlist(self, url: str, download_path: str, cookies=None):
+        error = self.validate_input(url, download_path)
+        if error:
+            raise ValueError(error)
+        return expand_playlist(self.yt_dlp_path, url, cookies)
+
+    def archived(self, url, info=None, cookies=None):
+        if self.archive is None:
+            return None
+        if info is None:
+            info = self.probe_cache.peek(url, cookies)
+        return self.archive.match(url, info)
+
+    def download_playlist(self, entries, download_path: str, limit=DEFAULT_PLAYLIST_LIMIT, **options):
+        if options.get("skip_archived", True):
+            pending = []
+            for entry in entries:
+                key = self.archived(entry["url"], entry)
+                if key:
+                    self.console.append(f"[archive] Skipping {entry.get('title') or entry['url']} ({key})")
+                else:
+                    pending.append(entry)
+            entries = pending
+        group = f"playlist-{next(self._playlist_ids)}"
+        self.queue.set_group_limit(group, limit)
+        jobs, rejected = [], []
+        for entry in entries:
+            try:
+                jobs.append(self.download_video(entry["url"], download_path, title=entry.get("title"), group=group, **options))
+            except ValueError as e:
+                self.console.append(f"[playlist] Not queued {entry.get('title') or entry['url']}: {e}")
+                rejected.append((entry, str(e)))
+        return jobs, rejected
+
+    def download_video(
+        self, url: str, download_path: str,
+        cookies=None, audio_only=False,
+        audio_format="Default", audio_quality="Default",
+        video_format="Default", video_quality="Default",
+        frag_from=None, frag_to=None,
+        sections=None,
+        cut_mode=None,
+        custom_arg=None,
+        concurrent_fragments=1,
+        http_chunk_size=None,
+        external_downloader=None,
+        engine=SUBPROCESS,
+        priority=0,
+        title=None,
+        group=None,
+        skip_archived=True,
+        pipeline=True
+    ):
+        error = self.validate_input(url, download_path) or validate_transfer_options(
+            concurrent_fragments, http_chunk_size, external_downloader
+        ) or validate_sections(frag_from, frag_to, sections)
+        if error:
+            raise ValueError(error)
+        if skip_archived and self.archived(url, cookies=cookies):
+            raise ValueError("This video is already in the download archive.")
+
+        spec = JobSpec.from_options(url, download_path, {
+            "cookies": cookies,
+            "audio_only": audio_only,
+            "audio_format": audio_format,
+            "audio_quality": audio_quality,
+            "video_format": video_format,
+            "video_quality": video_quality,
+            "frag_from": frag_from,
+            "frag_to": frag_to,
+            "sections": sections,
+            "cut_mode": cut_mode,
+            "custom_arg": custom_arg,
+            "concurrent_fragments": concurrent_fragments,
+            "http_chunk_size": http_chunk_size,
+            "external_downloader": external_downloader,
+            "engine": engine,
+            "skip_archived": skip_archived,
+            "pipeline": pipeline,
+        })
+        spec = self.planned(spec)
+        job = DownloadJob(url, spec.download_path, options=spec.options(), priority=priority, title=title, group=group)
+        job.spec = spec
+        return self.queue.submit(job)
+
+    def plan_for(self, spec):
+        if "live" in spec.url.lower() or overrides_format(spec):
+            return None
+        info = self.probe_cache.peek(spec.url, spec.cookies)
+        return plan_formats(info, spec) if info else None
+
+    def planned(self, spec):
+        if spec.format_ids:
+            return spec
+        plan = self.plan_for(spec)
+        return spec.replace(format_ids=plan.format_ids) if plan else spec
+
+    def command_for(self, spec, rate=None, job_id=None):
+        spec = self.planned(spec)
+        archive_path = None
+        if self.archive is not None and spec.skip_archived:
+            if uses_pipeline(spec):
+                archive_path = str(self.archive.pending_path(DownloadJob.peek_id() if job_id is None else job_id))
+            else:
+                archive_path = str(self.archive.path)
+        info_path = self.probe_cache.info_path(spec.url, spec.cookies)
+        return list(build_argv(
+            spec, str(self.yt_dlp_path), str(self.ffmpeg_dir), archive_path, str(info_path) if info_path else None, rate
+        ))
+
+    def build_command(self, job):
+        return self.command_for(job.spec, job.rate, job.id)
+
+    def pipeline_stats(self):
+        return {
+            "download": {
+                "workers": self.queue.max_workers,
+                "active": self.queue.running_count(),
+                "waiting": self.queue.pending_count(),
+            },
+            "postprocess": self.postprocess.stats(),
+        }
+
+    def metric_gauges(self):
+        stats = self.pipeline_stats()
+        return {
+            "download_workers": ("Parallel download slots.", stats["download"]["workers"]),
+            "downloads_active": ("Jobs in the download stage.", stats["download"]["active"]),
+            "downloads_queued": ("Jobs waiting for a download slot.", stats["download"]["waiting"]),
+            "postprocess_active": ("Jobs being post-processed.", stats["postprocess"]["active"]),
+            "postprocess_waiting": ("Jobs waiting for post-processing.", stats["postprocess"]["waiting"]),
+        }
+
+    def metrics_text(self):
+        self.metrics.update_gauges(self.metric_gauges())
+        return self.metrics.render()
+
+    def _record_metrics(self, job):
+        if job.finished:
+            self.metrics.update_gauges(self.metric_gauges())
+            self.metrics.record_job(job)
+
+    def run_job(self, job):
+        Path(job.download_path).mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        job.metrics.start()
+        if job.outputs and uses_pipeline(job.spec):
+            self.console.append(f"[#{job.id}] Resuming post-processing of {len(job.outputs)} downloaded files")
+            return True, "Downloaded, waiting for post-processing.", self._postprocess(job)
+        job.outputs = []
+        if self._defers_archive(job):
+            self.archive.snapshot(self.archive.pending_path(job.id))
+        if job.spec.engine == IN_PROCESS:
+            if in_process_available():
+                result = self._run_in_process(job)
+            else:
+                self.console.append(f"[#{job.id}] yt-dlp module not available, falling back to {SUBPROCESS} engine")
+                result = self._run_subprocess(job)
+        else:
+            result = self._run_subprocess(job)
+        job.stage_times["download"] = time.monotonic() - started
+        if self.archive is not None and result[0]:
+            self.archive.refresh()
+        if result[0] and job.outputs and uses_pipeline(job.spec) and not job.cancel_requested:
+            self.console.append(
+                f"[#{job.id}] Download stage took {job.stage_times['download']:.1f}s, "
+                f"{self.postprocess.stats()['waiting']} jobs waiting for post-processing"
+            )
+            return True, "Downloaded, waiting for post-processing.", self._postprocess(job)
+        self._settle_archive(job, result[0])
+        return result
+
+    def _postprocess(self, job):
+        future = self.postprocess.submit(job)
+        future.add_done_callback(
+            lambda f: self._settle_archive(job, not f.cancelled() and f.exception() is None and f.result()[0])
+        )
+        return future
+
+    def _defers_archive(self, job):
+        return self.archive is not None and job.spec.skip_archived and uses_pipeline(job.spec)
+
+    def _settle_archive(self, job, ok):
+        if not self._defers_archive(job):
+            return
+        pending = self.archive.pending_path(job.id)
+        if ok and not job.cancel_requested:
+            self.archive.commit(pending)
+        else:
+            self.archive.discard(pending)
+
+    def _track(self, job, record):
+        job.record = record
+        job.metrics.observe(record)
+        if not record.filename:
+            return
+        job.files.add(record.filename)
+        if record.stage == "download" and record.status == "finished" and record.filename not in job.outputs:
+            job.outputs.append(record.filename)
+
+    def _run_in_process(self, job):
+        if self.engine is None:
+            self.engine = InProcessEngine(workers=self.queue.max_workers)
+        self._start_rate(job)
+        cmd = self.build_command(job)
+        self.console.append(f"[#{job.id}] {format_command(cmd)}")
+        job.process = self.engine.handle(job.id)
+        if job.cancel_requested:
+            return False, "Download stopped by user."
+
+        network_error = False
+
+        def on_event(kind, payload):
+            nonlocal network_error
+            if kind == "output":
+                self.console.append(f"[#{job.id}] {payload}")
+                job.metrics.observe_line(payload)
+                network_error = network_error or is_network_error(payload)
+                return
+            self._track(job, payload)
+            self.console.append(f"[#{job.id}] [{payload.stage}] {payload.describe()}")
+            self.queue.update(job, progress=payload.percent)
+
+        job.metrics.exit_code = self.engine.run(job.id, cmd[1:], on_event)
+        return self._result(job.metrics.exit_code == 0, network_error)
+
+    def _start_rate(self, job):
+        job.rate = self._rates.get(job.id)
+        job.rate_since = time.monotonic()
+        job.restart_requested = False
+        if job.rate:
+            self.console.append(f"[#{job.id}] Bandwidth share: {format_rate(job.rate)}")
+
+    def _result(self, ok, network_error):
+        if ok:
+            connectivity.mark_online()
+            return True, "Download completed successfully!"
+        if network_error:
+            connectivity.mark_offline()
+            return False, "Download failed: no internet connection."
+        return False, "Download failed. Check output for details."
+
+    def _run_subprocess(self, job):
+        env = dict(**os.environ)
+        env["PATH"] = str(self.ffmpeg_dir) + os.pathsep + env.get("PATH", "")
+
+        si = None
+        if os.name == "nt":
+            si = subprocess.STARTUPINFO()
+            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            si.wShowWindow = subprocess.SW_HIDE
+
+        while True:
+            self._start_rate(job)
+            cmd = self.build_command(job)
+            self.console.append(f"[#{job.id}] {format_command(cmd)}")
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                env=env,
+                startupinfo=si,
+                bufsize=1
+            )
+            job.process = process
+            if job.cancel_requested:
+                process.terminate()
+
+            throttle = ProgressThrottle()
+            network_error = False
+
+            while True:
+                line = process.stdout.readline()
+                if not line:
+                    break
+                s = line.strip()
+                record = parse_progress_line(s)
+                if record is None:
+                    self.console.append(f"[#{job.id}] {s}")
+                    job.metrics.observe_line(s)
+                    network_error = network_error or is_network_error(s)
+                    continue
+                self._track(job, record)
+                if throttle.ready(record):
+                    self.console.append(f"[#{job.id}] [{record.stage}] {record.describe()}")
+                    self.queue.update(job, progress=record.percent)
+
+            process.wait()
+            job.metrics.exit_code = process.returncode
+            if process.returncode == 0 or not job.restart_requested or job.cancel_requested:
+                return self._result(process.returncode == 0, network_error)
+            self.console.append(f"[#{job.id}] Restarting to apply new bandwidth share")
+
+    def cancel_job(self, job_id):
+        return self.queue.cancel(job_id)
+
+    def set_job_priority(self, job_id, priority):
+        return self.queue.set_priority(job_id, priority)
+
+    def set_workers(self, workers):
+        self.queue.set_workers(workers)
+
+    def shutdown(self, keep_pending=False):
+        if self.store is not None and keep_pending:
+            self.store.close()
+        self.queue.cancel_all()
+        self.postprocess.shutdown()
+        if self.engine is not None:
+            self.engine.shutdown()
+        if self.store is not None and not keep_pending:
+            self.store.close()
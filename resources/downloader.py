@@ -1,30 +1,36 @@
-import subprocess
 import threading
-import re
-from pathlib import Path
-import validators
-import requests
 from PySide6.QtCore import QObject, Signal
 
-YT_DLP_PATH = Path(__file__).parent.parent / "data" / "requirements" / "yt-dlp.exe"
-FFMPEG_PATH = Path(__file__).parent.parent / "data" / "requirements"
+from resources.archive import DownloadArchive
+from resources.core import DownloadCore, DEFAULT_WORKERS, DEFAULT_PLAYLIST_LIMIT
+from resources.jobstore import JobStore
+from resources.jobqueue import DONE
 
 class Downloader(QObject):
-    output_signal = Signal(str)
     progress_signal = Signal(float)
     finished_signal = Signal(bool, str)
+    job_signal = Signal(object)
+    probe_signal = Signal(str, object)
+    playlist_signal = Signal(str, str, object)
 
-    def __init__(self, popup_manager, progress_callback=None, output_callback=None):
+    def __init__(self, popup_manager, progress_callback=None, console=None, job_callback=None, workers=DEFAULT_WORKERS, store_path=None, archive_path=None, yt_dlp_path=None, ffmpeg_dir=None):
         super().__init__()
         self.popup = popup_manager
-        self.process = None
         self.progress_callback = progress_callback
-        self.output_callback = output_callback
-        if self.output_callback:
-            self.output_signal.connect(lambda s: self.output_callback(s))
+        self.job_callback = job_callback
         if self.progress_callback:
             self.progress_signal.connect(lambda v: self.progress_callback(v))
+        if self.job_callback:
+            self.job_signal.connect(lambda j: self.job_callback(j))
         self.finished_signal.connect(self._on_finished_signal)
+        store = JobStore(store_path) if store_path else None
+        archive = DownloadArchive(archive_path) if archive_path else None
+        self.core = DownloadCore(
+            console=console, workers=workers, yt_dlp_path=yt_dlp_path, ffmpeg_dir=ffmpeg_dir, store=store, archive=archive
+        )
+        self.core.add_listener(self._on_job_changed)
+        self.queue = self.core.queue
+        self.console = self.core.console
 
     def _on_finished_signal(self, ok, msg):
         if ok:
@@ -32,135 +38,108 @@ class Downloader(QObject):
         else:
             self.popup.show_error(msg)
 
-    def check_internet(self):
-        try:
-            requests.get("https://www.google.com", timeout=5)
-            return True
-        except requests.RequestException:
-            return False
+    def _on_job_changed(self, job):
+        self.job_signal.emit(job)
+        active = self.queue.active_jobs()
+        if active:
+            self.progress_signal.emit(sum(j.progress for j in active) / len(active))
+        else:
+            self.progress_signal.emit(0.0)
+        if job.finished and not job.cancel_requested:
+            self.finished_signal.emit(job.state == DONE, job.message)
 
-    def validate_input(self, url: str, download_path: str) -> bool:
+    def probe(self, url: str, cookies=None):
         if not url:
             self.popup.show_error("No link provided.")
             return False
-        if not validators.url(url):
-            self.popup.show_error("The link provided is not valid.")
-            return False
-        if not download_path:
-            self.popup.show_error("No download path provided.")
-            return False
-        if not self.check_internet():
-            self.popup.show_error("No internet connection.")
-            return False
+
+        def run():
+            try:
+                info = self.core.probe(url, cookies)
+            except ValueError as e:
+                self.popup.show_error(str(e))
+                info = None
+            except Exception as e:
+                self.console.append(f"[probe] {e}")
+                self.popup.show_error("Cannot read video information.")
+                info = None
+            self.probe_signal.emit(url, info)
+
+        threading.Thread(target=run, daemon=True).start()
         return True
 
-    def download_video(
-        self, url: str, download_path: str,
-        cookies=None, audio_only=False,
-        audio_format="Default", audio_quality="Default",
-        video_format="Default", video_quality="Default",
-        frag_from=None, frag_to=None,
-        custom_arg=None,
-        on_finished=None
-    ):
-        if not self.validate_input(url, download_path):
-            if on_finished:
-                on_finished()
-            return
-
-        download_path = Path(download_path)
-        download_path.mkdir(parents=True, exist_ok=True)
-
-        env = dict(**subprocess.os.environ)
-        env["PATH"] = str(FFMPEG_PATH) + ";" + env.get("PATH", "")
-
-        cmd = [
-            str(YT_DLP_PATH),
-            "--no-playlist",
-            "-P", str(download_path),
-            "--ffmpeg-location", str(FFMPEG_PATH / "ffmpeg.exe")
-        ]
-
-        if cookies and cookies.lower() != "none":
-            cmd += ["--cookies-from-browser", cookies.lower()]
-        if frag_from and frag_to:
-            cmd += ["--download-sections", f"*{frag_from}-{frag_to}"]
-
-        is_live = "live" in url.lower()
-
-        if is_live:
-            cmd += ["--progress-template", "%(progress._percent_str)s"]
-        else:
-            if audio_only:
-                cmd.append("-x")
-                if audio_format.lower() != "default":
-                    cmd += ["--audio-format", audio_format.lower()]
-                if audio_quality.lower() != "default":
-                    cmd += ["--audio-quality", audio_quality.replace("kbps", "K")]
-            else:
-                cmd += ["-f", "bv+ba"]
-                if video_quality.lower() != "default":
-                    res_value = video_quality.replace("p", "")
-                    cmd += ["-S", f"res:{res_value}"]
-                if video_format.lower() != "default":
-                    cmd += ["--merge-output-format", video_format.lower()]
-
-        if custom_arg:
-            cmd += [custom_arg]
-        cmd.append(url)
+    def expand_playlist(self, url: str, download_path: str, cookies=None):
+        error = self.core.validate_input(url, download_path)
+        if error:
+            self.popup.show_error(error)
+            return False
 
         def run():
             try:
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = subprocess.SW_HIDE
-
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    env=env,
-                    startupinfo=si,
-                    bufsize=1
-                )
-
-                percent_re = re.compile(r'(\d+(?:\.\d+)?)%')
-
-                while True:
-                    line = self.process.stdout.readline()
-                    if not line:
-                        break
-                    s = line.strip()
-                    self.output_signal.emit(s)
-                    m = percent_re.search(s)
-                    if m:
-                        try:
-                            self.progress_signal.emit(float(m.group(1)))
-                        except:
-                            pass
-
-                self.process.wait()
-                if self.process.returncode == 0:
-                    self.finished_signal.emit(True, "Download completed successfully!")
-                else:
-                    self.finished_signal.emit(False, "Download failed. Check output for details.")
-            except Exception:
-                self.finished_signal.emit(False, "Download failed. Check output for details.")
-            finally:
-                self.process = None
-                self.progress_signal.emit(0.0)
-                if on_finished:
-                    on_finished()
+                title, entries = self.core.expand_playlist(url, download_path, cookies)
+            except Exception as e:
+                self.console.append(f"[playlist] {e}")
+                self.popup.show_error("Cannot read the playlist.")
+                title, entries = url, None
+            self.playlist_signal.emit(url, title, entries)
 
         threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def download_playlist(self, entries, download_path: str, limit=DEFAULT_PLAYLIST_LIMIT, **options):
+        jobs, rejected = self.core.download_playlist(entries, download_path, limit=limit, **options)
+        if rejected:
+            reasons = sorted({message for _, message in rejected})
+            self.popup.show_error(f"{len(rejected)} of {len(entries)} videos were not queued: {' '.join(reasons)}")
+        elif entries and not jobs:
+            self.popup.show_info("All selected videos are already downloaded.")
+        return jobs
+
+    def download_video(self, url: str, download_path: str, **options):
+        try:
+            return self.core.download_video(url, download_path, **options)
+        except ValueError as e:
+            self.popup.show_error(str(e))
+            return None
+
+    def command_for(self, spec):
+        return self.core.command_for(spec)
+
+    def plan_for(self, spec):
+        return self.core.plan_for(spec)
+
+    def pipeline_stats(self):
+        return self.core.pipeline_stats()
+
+    def metrics_summary(self):
+        return self.core.metrics.summary()
+
+    def cancel_job(self, job_id):
+        return self.core.cancel_job(job_id)
+
+    def set_job_priority(self, job_id, priority):
+        return self.core.set_job_priority(job_id, priority)
+
+    def set_workers(self, workers):
+        self.core.set_workers(workers)
+
+    def set_bandwidth(self, day_limit=None, night_limit=None, night_start=None, night_end=None):
+        self.core.set_bandwidth(day_limit, night_limit, night_start, night_end)
+
+    def restore_jobs(self):
+        jobs = self.core.restore()
+        if jobs:
+            self.popup.show_info(f"Resuming {len(jobs)} interrupted downloads.")
+        return jobs
+
+    def clear_finished(self):
+        return self.core.clear_finished()
+
+    def shutdown(self):
+        self.core.shutdown(keep_pending=True)
 
     def stop_download(self):
-        if self.process:
-            try:
-                self.process.terminate()
-            except Exception:
-                pass
-            self.process = None
+        if self.queue.active_jobs():
+            self.queue.cancel_all()
             self.popup.show_info("Download stopped by user.")
-            self.progress_signal.emit(0.0)
\ No newline at end of file
+            self.progress_signal.emit(0.0)
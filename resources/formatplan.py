@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+CODEC_ALIASES = {
+    "avc1": "h264", "avc3": "h264", "hev1": "h265", "hvc1": "h265", "hevc": "h265",
+    "vp09": "vp9", "av01": "av1", "mp4a": "aac", "ac-3": "ac3", "ec-3": "eac3",
+}
+CONTAINER_CODECS = {
+    "mp4": ({"h264", "h265", "av1"}, {"aac", "mp3", "ac3", "eac3", "alac"}),
+    "mov": ({"h264", "h265"}, {"aac", "mp3", "ac3", "alac"}),
+    "webm": ({"vp8", "vp9", "av1"}, {"opus", "vorbis"}),
+    "flv": ({"h264"}, {"aac", "mp3"}),
+    "avi": ({"h264", "mpeg4"}, {"mp3", "ac3"}),
+}
+MERGE_CONTAINERS = (("mp4", {"mp4", "m4a"}), ("webm", {"webm"}))
+AUDIO_EXTENSIONS = {"aac": "m4a", "alac": "m4a", "flac": "flac", "mp3": "mp3", "opus": "opus", "vorbis": "ogg"}
+AUDIO_ENCODERS = {
+    "aac": ("aac", "aac"),
+    "m4a": ("aac", "aac"),
+    "mp3": ("mp3", "libmp3lame"),
+    "ogg": ("vorbis", "libvorbis"),
+    "opus": ("opus", "libopus"),
+    "wav": (None, "pcm_s16le"),
+}
+SORT_HINTS = {
+    "mp4": "vcodec:h264,acodec:aac",
+    "mov": "vcodec:h264,acodec:aac",
+    "flv": "vcodec:h264,acodec:aac",
+    "avi": "vcodec:h264",
+    "webm": "vcodec:vp9,acodec:opus",
+    "aac": "acodec:aac",
+    "m4a": "acodec:aac",
+    "opus": "acodec:opus",
+    "ogg": "acodec:vorbis",
+}
+
+
+def codec_name(codec):
+    if not codec or codec == "none":
+        return None
+    name = codec.split(".")[0].lower()
+    return CODEC_ALIASES.get(name, name)
+
+
+def can_copy(container, kind, codec):
+    codecs = CONTAINER_CODECS.get(container)
+    if codecs is None or codec is None:
+        return True
+    return codec in codecs[0 if kind == "video" else 1]
+
+
+def merge_container(video_format, video, audio):
+    if video_format and video_format.lower() != "default":
+        return video_format.lower()
+    exts = {Path(video).suffix[1:].lower(), Path(audio).suffix[1:].lower()}
+    for container, compatible in MERGE_CONTAINERS:
+        if exts <= compatible:
+            return container
+    return "mkv"
+
+
+def sort_hint(spec):
+    target = spec.audio_format if spec.audio_only else spec.video_format
+    return SORT_HINTS.get(target.lower())
+
+
+def _bitrate(fmt):
+    return fmt.get("tbr") or fmt.get("vbr") or fmt.get("abr") or 0
+
+
+@dataclass(frozen=True)
+class FormatPlan:
+    container: str
+    video_id: str = None
+    video_codec: str = None
+    height: int = None
+    audio_id: str = None
+    audio_codec: str = None
+    video_copy: bool = True
+    audio_copy: bool = True
+
+    @property
+    def format_ids(self):
+        return "+".join(i for i in (self.video_id, self.audio_id) if i)
+
+    @property
+    def action(self):
+        return "copy" if self.video_copy and self.audio_copy else "transcode"
+
+    def describe(self):
+        parts = []
+        if self.video_id:
+            parts.append(f"{self.video_id} ({self.video_codec or '?'} {self.height or '?'}p)")
+        if self.audio_id:
+            parts.append(f"{self.audio_id} ({self.audio_codec or '?'})")
+        action = self.action
+        if action == "transcode":
+            streams = [name for name, copy in (("video", self.video_copy), ("audio", self.audio_copy)) if not copy]
+            action = f"transcode {' and '.join(streams)}"
+        return f"{' + '.join(parts)} -> {self.container}: {action}"
+
+
+def plan_formats(info, spec):
+    formats = [f for f in (info or {}).get("formats") or [] if f.get("format_id")]
+    videos = [f for f in formats if codec_name(f.get("vcodec")) and f.get("acodec") == "none"]
+    audios = [f for f in formats if codec_name(f.get("acodec")) and f.get("vcodec") == "none"]
+    if not audios:
+        return None
+
+    if spec.audio_only:
+        target = spec.audio_format.lower()
+        best = max(audios, key=_bitrate)
+        if target == "default":
+            codec = codec_name(best.get("acodec"))
+            return FormatPlan(AUDIO_EXTENSIONS.get(codec, best.get("ext") or "?"), audio_id=best["format_id"], audio_codec=codec)
+        copy_codec = AUDIO_ENCODERS.get(target, (target, None))[0]
+        matching = [a for a in audios if codec_name(a.get("acodec")) == copy_codec]
+        chosen = max(matching, key=_bitrate) if matching else best
+        return FormatPlan(
+            target, audio_id=chosen["format_id"], audio_codec=codec_name(chosen.get("acodec")), audio_copy=bool(matching)
+        )
+
+    if not videos:
+        return None
+    limit = None
+    if spec.video_quality.lower() != "default":
+        limit = int(spec.video_quality.lower().rstrip("p"))
+    within = [v for v in videos if not limit or (v.get("height") or 0) <= limit]
+    if not within:
+        lowest = min(v.get("height") or 0 for v in videos)
+        within = [v for v in videos if (v.get("height") or 0) == lowest]
+    top = max(v.get("height") or 0 for v in within)
+    candidates = [v for v in within if (v.get("height") or 0) == top]
+
+    container = spec.video_format.lower()
+    copyable = [v for v in (candidates if limit else within) if can_copy(container, "video", codec_name(v.get("vcodec")))]
+    if copyable:
+        video = max(copyable, key=lambda v: (v.get("height") or 0, _bitrate(v)))
+    else:
+        video = max(candidates, key=_bitrate)
+    audio_copyable = [a for a in audios if can_copy(container, "audio", codec_name(a.get("acodec")))]
+    audio = max(audio_copyable or audios, key=_bitrate)
+    if container == "default":
+        container = merge_container(None, f"v.{video.get('ext')}", f"a.{audio.get('ext')}")
+    return FormatPlan(
+        container,
+        video_id=video["format_id"],
+        video_codec=codec_name(video.get("vcodec")),
+        height=video.get("height"),
+        audio_id=audio["format_id"],
+        audio_codec=codec_name(audio.get("acodec")),
+        video_copy=bool(copyable),
+        audio_copy=bool(audio_copyable),
+    )
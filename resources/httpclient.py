@@ -0,0 +1,91 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (10, 60)
+POOL_HOSTS = 8
+POOL_CONNECTIONS_PER_HOST = 16
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "GUI-Video-Downloader"
+
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=RETRY_TOTAL, backoff=RETRY_BACKOFF, proxy=None):
+        self.timeout = timeout
+        self.proxy = proxy
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {}
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_CONNECTIONS_PER_HOST, max_retries=retry)
+        self._probe_adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_CONNECTIONS_PER_HOST, max_retries=0)
+
+    def _session(self, retry):
+        sessions = getattr(self._local, "sessions", None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        session = sessions.get(retry)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            adapter = self._adapter if retry else self._probe_adapter
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            sessions[retry] = session
+        return session
+
+    def set_proxy(self, proxy):
+        self.proxy = proxy or None
+
+    def _count(self, host, error=False):
+        with self._lock:
+            counter = self._counters.setdefault(host, {"requests": 0, "errors": 0})
+            counter["requests"] += 1
+            if error:
+                counter["errors"] += 1
+
+    def request(self, method, url, retry=True, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if self.proxy and "proxies" not in kwargs:
+            kwargs["proxies"] = {"http": self.proxy, "https": self.proxy}
+        host = urlsplit(url).netloc
+        try:
+            response = self._session(retry).request(method, url, **kwargs)
+        except requests.RequestException:
+            self._count(host, error=True)
+            raise
+        self._count(host, error=response.status_code >= 400)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault("allow_redirects", False)
+        return self.request("HEAD", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {host: dict(counter) for host, counter in self._counters.items()}
+
+    def close(self):
+        self._adapter.close()
+        self._probe_adapter.close()
+
+
+client = HttpClient()
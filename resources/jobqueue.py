@@ -0,0 +1,266 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import CancelledError
+
+from resources.metrics import JobMetrics
+
+QUEUED = "Queued"
+RUNNING = "Running"
+PROCESSING = "Processing"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+
+class DownloadJob:
+    _ids = itertools.count(1)
+    _id_lock = threading.Lock()
+
+    def __init__(self, url, download_path, options=None, priority=0, title=None, group=None, job_id=None):
+        if job_id is None:
+            with DownloadJob._id_lock:
+                job_id = next(DownloadJob._ids)
+        self.id = job_id
+        self.url = url
+        self.title = title or url
+        self.group = group
+        self.download_path = download_path
+        self.options = dict(options or {})
+        self.spec = None
+        self.priority = priority
+        self.state = QUEUED
+        self.progress = 0.0
+        self.record = None
+        self.message = ""
+        self.files = set()
+        self.outputs = []
+        self.stage_times = {}
+        self.metrics = JobMetrics()
+        self.process = None
+        self.followup = None
+        self.cancel_requested = False
+        self.rate = None
+        self.rate_since = 0.0
+        self.restart_requested = False
+
+    @classmethod
+    def reserve_ids(cls, last_id):
+        with cls._id_lock:
+            current = next(cls._ids)
+            cls._ids = itertools.count(max(current, last_id + 1))
+
+    @classmethod
+    def peek_id(cls):
+        with cls._id_lock:
+            current = next(cls._ids)
+            cls._ids = itertools.count(current)
+        return current
+
+    @property
+    def finished(self):
+        return self.state in FINAL_STATES
+
+    def to_dict(self, detail=False):
+        data = {
+            "id": self.id,
+            "url": self.url,
+            "title": self.title,
+            "state": self.state,
+            "priority": self.priority,
+            "progress": round(self.progress or 0.0, 1),
+            "message": self.message,
+            "rate": self.rate,
+            "stages": {stage: round(seconds, 2) for stage, seconds in self.stage_times.items()},
+            "metrics": self.metrics.as_dict(samples=detail),
+        }
+        if self.record is not None:
+            data["record"] = self.record.as_dict()
+        return data
+
+
+class DownloadQueue:
+    def __init__(self, runner, workers=2, listener=None):
+        self.runner = runner
+        self.listener = listener
+        self.max_workers = max(1, int(workers))
+        self._lock = threading.Lock()
+        self._pending = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._running = set()
+        self._group_limits = {}
+        self._group_running = {}
+
+    def submit(self, job):
+        with self._lock:
+            heapq.heappush(self._pending, (-job.priority, next(self._seq), job))
+            self._jobs[job.id] = job
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_jobs(self):
+        with self._lock:
+            return [j for j in self._jobs.values() if not j.finished]
+
+    def set_workers(self, workers):
+        with self._lock:
+            self.max_workers = max(1, int(workers))
+        self._dispatch()
+
+    def set_group_limit(self, group, limit):
+        with self._lock:
+            if limit:
+                self._group_limits[group] = max(1, int(limit))
+            else:
+                self._group_limits.pop(group, None)
+        self._dispatch()
+
+    def set_priority(self, job_id, priority):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != QUEUED:
+                return False
+            job.priority = priority
+            self._pending = [(-j.priority, seq, j) for _, seq, j in self._pending]
+            heapq.heapify(self._pending)
+        self._notify(job)
+        return True
+
+    def running_count(self):
+        with self._lock:
+            return len(self._running)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def cancel(self, job_id):
+        process = followup = None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.cancel_requested = True
+            if job.state == QUEUED:
+                self._pending = [e for e in self._pending if e[2] is not job]
+                heapq.heapify(self._pending)
+                job.state = CANCELLED
+                job.message = "Download cancelled by user."
+            else:
+                process = job.process
+                followup = job.followup
+        if followup is not None:
+            followup.cancel()
+        if process:
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        self._notify(job)
+        return True
+
+    def cancel_all(self):
+        for job in self.active_jobs():
+            self.cancel(job.id)
+
+    def clear_finished(self):
+        with self._lock:
+            removed = [j for j in self._jobs.values() if j.finished]
+            for job in removed:
+                del self._jobs[job.id]
+        return removed
+
+    def update(self, job, progress=None, message=None):
+        if progress is not None:
+            job.progress = progress
+        if message is not None:
+            job.message = message
+        self._notify(job)
+
+    def _dispatch(self):
+        started = []
+        with self._lock:
+            skipped = []
+            while self._pending and len(self._running) < self.max_workers:
+                entry = heapq.heappop(self._pending)
+                job = entry[2]
+                limit = self._group_limits.get(job.group)
+                if limit and self._group_running.get(job.group, 0) >= limit:
+                    skipped.append(entry)
+                    continue
+                job.state = RUNNING
+                self._running.add(job.id)
+                if job.group is not None:
+                    self._group_running[job.group] = self._group_running.get(job.group, 0) + 1
+                started.append(job)
+            for entry in skipped:
+                heapq.heappush(self._pending, entry)
+        for job in started:
+            self._notify(job)
+            threading.Thread(target=self._work, args=(job,), daemon=True).start()
+
+    def _work(self, job):
+        try:
+            result = self.runner(job)
+        except Exception:
+            result = False, "Download failed. Check output for details."
+        ok, message = result[:2]
+        followup = result[2] if len(result) > 2 else None
+        with self._lock:
+            self._running.discard(job.id)
+            if job.group is not None:
+                self._group_running[job.group] -= 1
+            job.process = None
+            if followup is not None and ok and not job.cancel_requested:
+                job.state = PROCESSING
+                job.message = message
+                job.followup = followup
+            else:
+                if followup is not None:
+                    followup.cancel()
+                    followup = None
+                self._finish(job, ok, message)
+        self._notify(job)
+        self._dispatch()
+        if followup is not None:
+            followup.add_done_callback(lambda future: self._complete(job, future))
+
+    def _complete(self, job, future):
+        try:
+            ok, message = future.result()
+        except (CancelledError, Exception):
+            ok, message = False, "Post-processing failed. Check output for details."
+        with self._lock:
+            job.process = None
+            job.followup = None
+            self._finish(job, ok, message)
+        self._notify(job)
+
+    def _finish(self, job, ok, message):
+        if job.cancel_requested:
+            job.state = CANCELLED
+            job.message = "Download stopped by user."
+        else:
+            job.state = DONE if ok else FAILED
+            job.message = message
+            if ok:
+                job.progress = 100.0
+
+    def _notify(self, job):
+        if self.listener:
+            try:
+                self.listener(job)
+            except Exception:
+                pass
@@ -0,0 +1,99 @@
+import os
+import shlex
+import subprocess
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+
+from resources.ytdlp_engine import SUBPROCESS
+
+FAST_CUT = "fast"
+EXACT_CUT = "exact"
+CUT_MODES = (FAST_CUT, EXACT_CUT)
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    url: str
+    download_path: str
+    cookies: str = "None"
+    audio_only: bool = False
+    audio_format: str = "Default"
+    audio_quality: str = "Default"
+    video_format: str = "Default"
+    video_quality: str = "Default"
+    frag_from: str = ""
+    frag_to: str = ""
+    sections: str = ""
+    cut_mode: str = FAST_CUT
+    custom_arg: str = ""
+    concurrent_fragments: int = 1
+    http_chunk_size: str = ""
+    external_downloader: str = "Default"
+    engine: str = SUBPROCESS
+    skip_archived: bool = True
+    pipeline: bool = True
+    format_ids: str = ""
+
+    @classmethod
+    def from_options(cls, url, download_path, options=None):
+        names = {f.name for f in fields(cls)} - {"url", "download_path"}
+        values = {k: v for k, v in (options or {}).items() if k in names and v is not None}
+        if "audio_only" in values:
+            values["audio_only"] = bool(values["audio_only"])
+        for name in ("skip_archived", "pipeline"):
+            if name in values:
+                values[name] = bool(values[name])
+        if "concurrent_fragments" in values:
+            values["concurrent_fragments"] = int(values["concurrent_fragments"] or 1)
+        return cls(url=url or "", download_path=os.path.abspath(download_path) if download_path else "", **values)
+
+    def options(self):
+        data = asdict(self)
+        del data["url"]
+        del data["download_path"]
+        return data
+
+    def replace(self, **changes):
+        return replace(self, **changes)
+
+
+JOB_OPTIONS = tuple(
+    f.name for f in fields(JobSpec) if f.name not in ("url", "download_path", "format_ids")
+) + ("priority", "title")
+OPTION_TYPES = dict({f.name: f.type for f in fields(JobSpec)}, priority=int, title=str)
+
+
+def job_options(spec):
+    options = {}
+    for name in JOB_OPTIONS:
+        value = spec.get(name)
+        if value is None:
+            continue
+        kind = OPTION_TYPES[name]
+        if kind is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"Option {name} must be true or false.")
+        elif kind is int:
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise ValueError(f"Option {name} must be an integer.")
+            try:
+                value = int(value)
+            except ValueError:
+                raise ValueError(f"Option {name} must be an integer.") from None
+        elif not isinstance(value, str):
+            raise ValueError(f"Option {name} must be a string.")
+        options[name] = value
+    return options
+
+
+def job_path(download_path, name):
+    path, base = Path(name), Path(download_path)
+    if path.is_absolute() or path.parts[:len(base.parts)] == base.parts:
+        return path
+    return base / path
+
+
+def format_command(argv):
+    if os.name == "nt":
+        return subprocess.list2cmdline(argv)
+    return shlex.join(argv)
@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+from resources.jobqueue import PROCESSING, QUEUED, RUNNING
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    download_path TEXT NOT NULL,
+    options TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    group_name TEXT,
+    state TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    files TEXT NOT NULL DEFAULT '[]',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+UPSERT = """
+INSERT INTO jobs (id, url, title, download_path, options, priority, group_name, state, progress, message, files, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    priority = excluded.priority,
+    state = excluded.state,
+    progress = excluded.progress,
+    message = excluded.message,
+    files = excluded.files,
+    updated_at = excluded.updated_at
+"""
+
+
+class JobStore:
+    def __init__(self, path, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._deleted = set()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def max_id(self):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT MAX(id) FROM jobs").fetchone()
+        return row[0] or 0
+
+    def record(self, job):
+        now = time.time()
+        row = (
+            job.id, job.url, job.title, str(job.download_path), json.dumps(job.options),
+            job.priority, job.group, job.state, job.progress or 0.0, job.message,
+            json.dumps(sorted(job.files)), now, now,
+        )
+        with self._lock:
+            self._pending[job.id] = row
+            self._deleted.discard(job.id)
+
+    def forget(self, job_ids):
+        with self._lock:
+            for job_id in job_ids:
+                self._pending.pop(job_id, None)
+                self._deleted.add(job_id)
+
+    def interrupted(self):
+        self.flush()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, url, title, download_path, options, priority, group_name, files, state "
+                "FROM jobs WHERE state IN (?, ?, ?) ORDER BY id",
+                (QUEUED, RUNNING, PROCESSING)
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "url": row[1],
+                "title": row[2],
+                "download_path": row[3],
+                "options": json.loads(row[4]),
+                "priority": row[5],
+                "group": row[6],
+                "files": json.loads(row[7]),
+                "state": row[8],
+            }
+            for row in rows
+        ]
+
+    def flush(self):
+        with self._lock:
+            rows = list(self._pending.values())
+            deleted = list(self._deleted)
+            self._pending.clear()
+            self._deleted.clear()
+        if not rows and not deleted:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                if rows:
+                    conn.executemany(UPSERT, rows)
+                if deleted:
+                    conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in deleted])
+        except sqlite3.Error:
+            with self._lock:
+                newer = set(self._pending) | self._deleted
+                for row in rows:
+                    if row[0] not in newer:
+                        self._pending[row[0]] = row
+                self._deleted.update(job_id for job_id in deleted if job_id not in newer)
+
+    def _write_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._writer.join(timeout=5)
+        self.flush()
@@ -0,0 +1,309 @@
+import os
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from resources.jobspec import job_path
+
+SAMPLE_INTERVAL = 1.0
+MAX_SAMPLES = 240
+RECENT_JOBS = 200
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+THROUGHPUT_BUCKETS = tuple(1024 * 1024 * mib for mib in (0.125, 0.5, 1, 2, 5, 10, 25, 50, 100))
+RETRY_RE = re.compile(r"\bRetrying (?:fragment \d+ )?\(\d+/\d+\)")
+PREFIX = "gvd"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class JobMetrics:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = None
+        self.extraction = None
+        self.ttfb = None
+        self.samples = []
+        self.retries = 0
+        self.exit_code = None
+        self.bytes_on_disk = None
+        self._downloaded = {}
+        self._last_sample = None
+
+    def start(self):
+        if self.started is None:
+            self.started = self.clock()
+
+    def elapsed(self):
+        return self.clock() - self.started if self.started is not None else 0.0
+
+    @property
+    def downloaded(self):
+        return sum(self._downloaded.values())
+
+    @property
+    def throughput(self):
+        if not self.samples or self.ttfb is None:
+            return None
+        seconds = self.samples[-1][0] - self.ttfb
+        return self.samples[-1][1] / seconds if seconds > 0 else None
+
+    def observe_line(self, line):
+        if RETRY_RE.search(line):
+            self.retries += 1
+
+    def observe(self, record):
+        if record.stage != "download" or self.started is None:
+            return
+        now = self.elapsed()
+        if self.extraction is None:
+            self.extraction = now
+        if record.downloaded:
+            self._downloaded[record.filename] = record.downloaded
+            if self.ttfb is None:
+                self.ttfb = now
+        if self._last_sample is None or now - self._last_sample >= SAMPLE_INTERVAL or record.status == "finished":
+            self._last_sample = now
+            self.samples.append((round(now, 2), self.downloaded, record.speed))
+            if len(self.samples) > MAX_SAMPLES:
+                self.samples = self.samples[::2]
+
+    def measure_disk(self, download_path, files):
+        total = 0
+        for name in files:
+            try:
+                total += job_path(download_path, name).stat().st_size
+            except OSError:
+                pass
+        self.bytes_on_disk = total
+        return total
+
+    def as_dict(self, samples=False):
+        data = {
+            "extraction": self.extraction,
+            "ttfb": self.ttfb,
+            "downloaded_bytes": self.downloaded,
+            "throughput": self.throughput,
+            "retries": self.retries,
+            "exit_code": self.exit_code,
+            "bytes_on_disk": self.bytes_on_disk,
+        }
+        if samples:
+            data["samples"] = list(self.samples)
+        return data
+
+    def describe(self):
+        parts = []
+        if self.extraction is not None:
+            parts.append(f"extraction {self.extraction:.1f}s")
+        if self.ttfb is not None:
+            parts.append(f"first byte {self.ttfb:.1f}s")
+        if self.throughput:
+            parts.append(f"{self.throughput / (1024 * 1024):.2f} MiB/s")
+        if self.retries:
+            parts.append(f"{self.retries} retries")
+        if self.bytes_on_disk is not None:
+            parts.append(f"{self.bytes_on_disk / (1024 * 1024):.1f} MiB on disk")
+        if self.exit_code is not None:
+            parts.append(f"exit {self.exit_code}")
+        return ", ".join(parts)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def lines(self, name, labels=()):
+        lines = [
+            f"{name}_bucket{_label_text(labels + (('le', _number(float(bound))),))} {count}"
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f"{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {self.count}")
+        lines.append(f"{name}_sum{_label_text(labels)} {_number(round(self.sum, 6))}")
+        lines.append(f"{name}_count{_label_text(labels)} {self.count}")
+        return lines
+
+
+JOB_HISTOGRAMS = (
+    ("job_extraction_seconds", "Time from job start until yt-dlp began downloading.", DURATION_BUCKETS),
+    ("job_time_to_first_byte_seconds", "Time from job start until the first byte arrived.", DURATION_BUCKETS),
+    ("job_download_seconds", "Time spent in the download stage.", DURATION_BUCKETS),
+    ("job_postprocess_seconds", "Time spent in the post-processing stage.", DURATION_BUCKETS),
+    ("job_throughput_bytes_per_second", "Average download throughput after the first byte.", THROUGHPUT_BUCKETS),
+)
+DEPENDENCY_HISTOGRAMS = (
+    ("dependency_download_seconds", "Time spent downloading a dependency.", DURATION_BUCKETS),
+    ("dependency_time_to_first_byte_seconds", "Time until the first dependency byte arrived.", DURATION_BUCKETS),
+)
+
+
+class MetricsRegistry:
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._recorded = set()
+        self._recent = deque(maxlen=RECENT_JOBS)
+        self._jobs = {}
+        self._counters = {"downloaded_bytes": 0, "disk_bytes": 0, "retries": 0}
+        self._histograms = {name: _Histogram(buckets) for name, _, buckets in JOB_HISTOGRAMS}
+        self._dependencies = {}
+        self._dependency_histograms = {}
+        self._gauges = {}
+
+    def set_path(self, path):
+        self.path = Path(path) if path else None
+        self.write()
+
+    def update_gauges(self, gauges):
+        with self._lock:
+            self._gauges = dict(gauges)
+
+    def record_job(self, job):
+        with self._lock:
+            if job.id in self._recorded:
+                return
+            self._recorded.add(job.id)
+        m = job.metrics
+        m.measure_disk(job.download_path, job.files)
+        values = {
+            "job_extraction_seconds": m.extraction,
+            "job_time_to_first_byte_seconds": m.ttfb,
+            "job_download_seconds": job.stage_times.get("download"),
+            "job_postprocess_seconds": job.stage_times.get("postprocess"),
+            "job_throughput_bytes_per_second": m.throughput,
+        }
+        key = (job.state, "" if m.exit_code is None else str(m.exit_code))
+        with self._lock:
+            self._jobs[key] = self._jobs.get(key, 0) + 1
+            self._counters["downloaded_bytes"] += m.downloaded
+            self._counters["disk_bytes"] += m.bytes_on_disk
+            self._counters["retries"] += m.retries
+            for name, value in values.items():
+                if value is not None:
+                    self._histograms[name].observe(value)
+            self._recent.append(dict(values, state=job.state, retries=m.retries, disk_bytes=m.bytes_on_disk))
+        self.write()
+
+    def record_dependency(self, name, status, seconds, nbytes, ttfb=None, retries=0):
+        with self._lock:
+            counter = self._dependencies.setdefault(name, {"statuses": {}, "bytes": 0, "retries": 0})
+            counter["statuses"][status] = counter["statuses"].get(status, 0) + 1
+            counter["bytes"] += nbytes
+            counter["retries"] += retries
+            histograms = self._dependency_histograms.setdefault(
+                name, {hname: _Histogram(buckets) for hname, _, buckets in DEPENDENCY_HISTOGRAMS}
+            )
+            histograms["dependency_download_seconds"].observe(seconds)
+            if ttfb is not None:
+                histograms["dependency_time_to_first_byte_seconds"].observe(ttfb)
+        self.write()
+
+    def summary(self):
+        with self._lock:
+            recent = list(self._recent)
+            jobs = dict(self._jobs)
+            counters = dict(self._counters)
+
+        def median(name):
+            values = [job[name] for job in recent if job[name] is not None]
+            return statistics.median(values) if values else None
+
+        states = {}
+        for (state, _), count in jobs.items():
+            states[state] = states.get(state, 0) + count
+        return {
+            "jobs": states,
+            "retries": counters["retries"],
+            "downloaded_bytes": counters["downloaded_bytes"],
+            "disk_bytes": counters["disk_bytes"],
+            "median_extraction": median("job_extraction_seconds"),
+            "median_ttfb": median("job_time_to_first_byte_seconds"),
+            "median_download": median("job_download_seconds"),
+            "median_postprocess": median("job_postprocess_seconds"),
+            "median_throughput": median("job_throughput_bytes_per_second"),
+        }
+
+    def render(self):
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        with self._lock:
+            header("jobs_total", "counter", "Finished jobs by final state and yt-dlp exit code.")
+            for (state, code), count in sorted(self._jobs.items()):
+                lines.append(f"{PREFIX}_jobs_total{_label_text((('state', state.lower()), ('exit_code', code)))} {count}")
+            for name, help_text in (
+                ("downloaded_bytes", "Bytes reported downloaded by yt-dlp."),
+                ("disk_bytes", "Bytes on disk of finished job outputs."),
+                ("retries", "Retries reported by yt-dlp."),
+            ):
+                header(f"{name}_total", "counter", help_text)
+                lines.append(f"{PREFIX}_{name}_total {self._counters[name]}")
+            for name, help_text, _ in JOB_HISTOGRAMS:
+                header(name, "histogram", help_text)
+                lines += self._histograms[name].lines(f"{PREFIX}_{name}")
+
+            if self._dependencies:
+                header("dependency_downloads_total", "counter", "Dependency downloads by result.")
+                for dep, counter in sorted(self._dependencies.items()):
+                    for status, count in sorted(counter["statuses"].items()):
+                        lines.append(
+                            f"{PREFIX}_dependency_downloads_total{_label_text((('name', dep), ('status', status)))} {count}"
+                        )
+                for key, help_text in (("bytes", "Dependency bytes written, including resumed parts."), ("retries", "Dependency HTTP retries.")):
+                    header(f"dependency_{key}_total", "counter", help_text)
+                    for dep, counter in sorted(self._dependencies.items()):
+                        lines.append(f"{PREFIX}_dependency_{key}_total{_label_text((('name', dep),))} {counter[key]}")
+                for name, help_text, _ in DEPENDENCY_HISTOGRAMS:
+                    header(name, "histogram", help_text)
+                    for dep, histograms in sorted(self._dependency_histograms.items()):
+                        lines += histograms[name].lines(f"{PREFIX}_{name}", (("name", dep),))
+
+            for name, (help_text, value) in self._gauges.items():
+                header(name, "gauge", help_text)
+                lines.append(f"{PREFIX}_{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        if self.path is None:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(self.render(), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+metrics = MetricsRegistry()
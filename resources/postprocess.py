@@ -0,0 +1,189 @@
+import os
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from resources.formatplan import AUDIO_ENCODERS, AUDIO_EXTENSIONS, can_copy, codec_name, merge_container
+from resources.jobspec import format_command, job_path
+
+DEFAULT_POSTPROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+PIPELINE_TEMPLATE = "%(title)s [%(id)s].f%(format_id)s.%(ext)s"
+PIPELINE_SECTION_TEMPLATE = "%(title)s [%(id)s] %(section_start)ds.f%(format_id)s.%(ext)s"
+FORMAT_SUFFIX_RE = re.compile(r"\.f[^.]+$")
+FFMPEG_ARGS = ["-hide_banner", "-loglevel", "warning", "-nostdin", "-y"]
+
+
+def base_path(source):
+    source = Path(source)
+    return source.with_name(FORMAT_SUFFIX_RE.sub("", source.stem))
+
+
+def output_path(source, ext):
+    base = base_path(source)
+    return base.with_name(base.name + "." + ext)
+
+
+def without_stream_copy(cmd):
+    args = []
+    for arg in cmd:
+        if arg == "copy" and args and args[-1].startswith("-c"):
+            args.pop()
+            continue
+        args.append(arg)
+    return args
+
+
+def _startupinfo():
+    if os.name != "nt":
+        return None
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    si.wShowWindow = subprocess.SW_HIDE
+    return si
+
+
+class PostProcessPool:
+    def __init__(self, ffmpeg_path, ffprobe_path, console, workers=DEFAULT_POSTPROCESS_WORKERS):
+        self.ffmpeg_path = str(ffmpeg_path)
+        self.ffprobe_path = str(ffprobe_path)
+        self.console = console
+        self.workers = max(1, int(workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="postprocess")
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._active = 0
+
+    def submit(self, job):
+        with self._lock:
+            self._waiting += 1
+        future = self._executor.submit(self._process, job, time.monotonic())
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        if future.cancelled():
+            with self._lock:
+                self._waiting -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "active": self._active, "waiting": self._waiting}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream_codec(self, path, stream):
+        try:
+            result = subprocess.run(
+                [self.ffprobe_path, "-v", "error", "-select_streams", stream,
+                 "-show_entries", "stream=codec_name", "-of", "csv=p=0", str(path)],
+                capture_output=True, text=True, timeout=30, startupinfo=_startupinfo()
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return codec_name(result.stdout.strip())
+
+    def plan(self, spec, files):
+        groups = {}
+        for path in files:
+            groups.setdefault(base_path(path), []).append(path)
+        steps = [self.plan_group(spec, group) for group in groups.values()]
+        return [step for step in steps if step]
+
+    def plan_group(self, spec, files):
+        if spec.audio_only:
+            source = files[-1]
+            codec = self.stream_codec(source, "a:0")
+            target = spec.audio_format.lower()
+            if target == "default":
+                ext = AUDIO_EXTENSIONS.get(codec)
+                if not ext:
+                    return None
+                codec_args = ["-c:a", "copy"]
+            else:
+                copy_codec, encoder = AUDIO_ENCODERS.get(target, (target, None))
+                ext = target
+                if codec and codec == copy_codec:
+                    codec_args = ["-c:a", "copy"]
+                else:
+                    codec_args = ["-c:a", encoder] if encoder else []
+                    if spec.audio_quality.lower() != "default":
+                        codec_args += ["-b:a", spec.audio_quality.replace("kbps", "k")]
+            output = output_path(source, ext)
+            return [source], output, [self.ffmpeg_path, *FFMPEG_ARGS, "-i", str(source), "-vn", *codec_args, str(output)]
+
+        if len(files) < 2:
+            return None
+        video, audio = sorted(files[:2], key=lambda path: self.stream_codec(path, "v:0") is None)
+        container = merge_container(spec.video_format, video, audio)
+        output = output_path(video, container)
+        codec_args = []
+        if can_copy(container, "video", self.stream_codec(video, "v:0")):
+            codec_args += ["-c:v", "copy"]
+        if can_copy(container, "audio", self.stream_codec(audio, "a:0")):
+            codec_args += ["-c:a", "copy"]
+        cmd = [self.ffmpeg_path, *FFMPEG_ARGS, "-i", str(video), "-i", str(audio),
+               "-map", "0:v:0", "-map", "1:a:0", *codec_args, str(output)]
+        return [video, audio], output, cmd
+
+    def _run(self, job, cmd):
+        self.console.append(f"[#{job.id}] {format_command(cmd)}")
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            startupinfo=_startupinfo()
+        )
+        job.process = process
+        if job.cancel_requested:
+            process.terminate()
+        for line in process.stdout:
+            if line.strip():
+                self.console.append(f"[#{job.id}] [ffmpeg] {line.strip()}")
+        process.wait()
+        return process.returncode == 0
+
+    def _process(self, job, queued_at):
+        started = time.monotonic()
+        with self._lock:
+            self._waiting -= 1
+            self._active += 1
+        job.stage_times["postprocess_wait"] = started - queued_at
+        try:
+            files = [job_path(job.download_path, name) for name in job.outputs]
+            steps = self.plan(job.spec, files)
+            if not steps:
+                self.console.append(f"[#{job.id}] Nothing to post-process")
+            for inputs, output, cmd in steps:
+                ok = self._run(job, cmd)
+                if not ok and "copy" in cmd and not job.cancel_requested:
+                    self.console.append(f"[#{job.id}] Stream copy failed, re-encoding")
+                    ok = self._run(job, without_stream_copy(cmd))
+                if not ok:
+                    return False, "Post-processing failed. Check output for details."
+                consumed = {str(path) for path in inputs}
+                job.files = {name for name in job.files if str(job_path(job.download_path, name)) not in consumed}
+                for path in inputs:
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                job.files.add(str(output))
+            return True, "Download completed successfully!"
+        except OSError as e:
+            self.console.append(f"[#{job.id}] [ffmpeg] {e}")
+            return False, "Post-processing failed. Check output for details."
+        finally:
+            job.stage_times["postprocess"] = time.monotonic() - started
+            with self._lock:
+                self._active -= 1
+            self.console.append(
+                f"[#{job.id}] Post-processing took {job.stage_times['postprocess']:.1f}s "
+                f"after waiting {job.stage_times['postprocess_wait']:.1f}s"
+            )
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent.parent / "data" / "cache" / "probe"
+DEFAULT_TTL = 60 * 60
+MEMORY_ENTRIES = 16
+
+
+def _cache_key(url, cookies=None):
+    raw = f"{url}\n{(cookies or '').lower()}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ProbeCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, max_entries=MEMORY_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+
+    def path(self, url, cookies=None):
+        return self.cache_dir / f"{_cache_key(url, cookies)}.info.json"
+
+    def _remember(self, key, fetched_at, info):
+        self._memory[key] = (fetched_at, info)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, url, cookies=None):
+        key = _cache_key(url, cookies)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                if now - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+        path = self.cache_dir / f"{key}.info.json"
+        try:
+            fetched_at = path.stat().st_mtime
+            if now - fetched_at >= self.ttl:
+                path.unlink()
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._remember(key, fetched_at, info)
+        return info
+
+    def peek(self, url, cookies=None):
+        with self._lock:
+            entry = self._memory.get(_cache_key(url, cookies))
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def put(self, url, info, cookies=None):
+        key = _cache_key(url, cookies)
+        path = self.cache_dir / f"{key}.info.json"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            tmp.replace(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._remember(key, time.time(), info)
+
+    def info_path(self, url, cookies=None):
+        path = self.path(url, cookies)
+        try:
+            if time.time() - path.stat().st_mtime < self.ttl:
+                return path
+        except OSError:
+            pass
+        return None
+
+    def purge_expired(self):
+        now = time.time()
+        try:
+            entries = list(self.cache_dir.glob("*.info.json"))
+        except OSError:
+            return
+        for path in entries:
+            try:
+                if now - path.stat().st_mtime >= self.ttl:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+def probe_command(yt_dlp_path, url, cookies=None):
+    cmd = [str(yt_dlp_path), "-J", "--no-playlist", "--no-warnings"]
+    if cookies and cookies.lower() != "none":
+        cmd += ["--cookies-from-browser", cookies.lower()]
+    cmd.append(url)
+    return cmd
+
+
+def _run_json(cmd, timeout):
+    result = subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=timeout,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "Probe failed.")
+    return json.loads(result.stdout)
+
+
+def run_probe(yt_dlp_path, url, cookies=None, cache=None, timeout=120):
+    if cache is not None:
+        info = cache.get(url, cookies)
+        if info is not None:
+            return info
+    info = _run_json(probe_command(yt_dlp_path, url, cookies), timeout)
+    if cache is not None:
+        cache.put(url, info, cookies)
+    return info
+
+
+def playlist_command(yt_dlp_path, url, cookies=None):
+    cmd = [str(yt_dlp_path), "-J", "--flat-playlist", "--yes-playlist", "--no-warnings"]
+    if cookies and cookies.lower() != "none":
+        cmd += ["--cookies-from-browser", cookies.lower()]
+    cmd.append(url)
+    return cmd
+
+
+def expand_playlist(yt_dlp_path, url, cookies=None, timeout=300):
+    info = _run_json(playlist_command(yt_dlp_path, url, cookies), timeout)
+    if info.get("_type") not in ("playlist", "multi_video"):
+        return info.get("title") or url, [{
+            "url": info.get("webpage_url") or url,
+            "title": info.get("title") or url,
+            "id": info.get("id"),
+            "ie_key": info.get("extractor_key"),
+        }]
+    entries = []
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        entry_url = entry.get("webpage_url") or entry.get("url")
+        if not entry_url:
+            continue
+        entries.append({
+            "url": entry_url,
+            "title": entry.get("title") or entry_url,
+            "id": entry.get("id"),
+            "ie_key": entry.get("ie_key"),
+        })
+    return info.get("title") or url, entries
+
+
+def video_heights(info):
+    heights = {f.get("height") for f in info.get("formats") or [] if f.get("vcodec") not in (None, "none")}
+    return sorted((h for h in heights if h), reverse=True)
+
+
+def audio_bitrates(info):
+    rates = {int(f["abr"]) for f in info.get("formats") or []
+             if f.get("acodec") not in (None, "none") and f.get("vcodec") in (None, "none") and f.get("abr")}
+    return sorted(rates, reverse=True)
+
+
+def video_containers(info):
+    exts = []
+    for f in info.get("formats") or []:
+        if f.get("vcodec") not in (None, "none") and f.get("ext") and f["ext"] not in exts:
+            exts.append(f["ext"])
+    return exts
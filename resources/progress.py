@@ -0,0 +1,127 @@
+import json
+import time
+
+PROGRESS_PREFIX = "__gvd_progress__"
+DOWNLOAD_FIELDS = "status,downloaded_bytes,total_bytes,total_bytes_estimate,speed,eta,elapsed,fragment_index,fragment_count,filename"
+POSTPROCESS_FIELDS = "status,postprocessor"
+DEFAULT_PROGRESS_RATE = 5
+
+PROGRESS_ARGS = [
+    "--newline",
+    "--progress-template", f"download:{PROGRESS_PREFIX} download %(progress.{{{DOWNLOAD_FIELDS}}})j",
+    "--progress-template", f"postprocess:{PROGRESS_PREFIX} postprocess %(progress.{{{POSTPROCESS_FIELDS}}})j",
+]
+
+
+def _format_bytes(value):
+    value = float(value)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.1f}{unit}" if unit != "B" else f"{int(value)}B"
+        value /= 1024
+
+
+def _format_eta(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressRecord:
+    __slots__ = ("stage", "status", "downloaded", "total", "speed", "eta",
+                 "fragment_index", "fragment_count", "postprocessor", "filename")
+
+    def __init__(self, stage="download", status="downloading", downloaded=None, total=None,
+                 speed=None, eta=None, fragment_index=None, fragment_count=None, postprocessor=None, filename=None):
+        self.stage = stage
+        self.status = status
+        self.downloaded = downloaded
+        self.total = total
+        self.speed = speed
+        self.eta = eta
+        self.fragment_index = fragment_index
+        self.fragment_count = fragment_count
+        self.postprocessor = postprocessor
+        self.filename = filename
+
+    @classmethod
+    def from_dict(cls, stage, data):
+        return cls(
+            stage=stage,
+            status=data.get("status") or "downloading",
+            downloaded=data.get("downloaded_bytes"),
+            total=data.get("total_bytes") or data.get("total_bytes_estimate"),
+            speed=data.get("speed"),
+            eta=data.get("eta"),
+            fragment_index=data.get("fragment_index"),
+            fragment_count=data.get("fragment_count"),
+            postprocessor=data.get("postprocessor"),
+            filename=data.get("filename"),
+        )
+
+    @property
+    def percent(self):
+        if self.stage != "download":
+            return 100.0
+        if self.status == "finished":
+            return 100.0
+        if self.downloaded is not None and self.total:
+            return min(100.0, self.downloaded * 100.0 / self.total)
+        if self.fragment_index is not None and self.fragment_count:
+            return min(100.0, self.fragment_index * 100.0 / self.fragment_count)
+        return None
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["percent"] = self.percent
+        return data
+
+    def describe(self):
+        if self.stage != "download":
+            return f"{self.postprocessor or 'Post-processing'} {self.status}"
+        parts = []
+        percent = self.percent
+        if percent is not None:
+            parts.append(f"{percent:.1f}%")
+        if self.total:
+            parts.append(f"of {_format_bytes(self.total)}")
+        if self.speed:
+            parts.append(f"at {_format_bytes(self.speed)}/s")
+        if self.eta is not None and self.status == "downloading":
+            parts.append(f"ETA {_format_eta(self.eta)}")
+        if self.fragment_count:
+            parts.append(f"(frag {self.fragment_index or 0}/{self.fragment_count})")
+        return " ".join(parts) or self.status
+
+
+def parse_progress_line(line):
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        _, stage, payload = line.split(" ", 2)
+        data = json.loads(payload)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    return ProgressRecord.from_dict(stage, data)
+
+
+class ProgressThrottle:
+    def __init__(self, max_rate=DEFAULT_PROGRESS_RATE, clock=time.monotonic):
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.clock = clock
+        self._last = None
+        self._last_key = None
+
+    def ready(self, record):
+        now = self.clock()
+        key = (record.stage, record.status)
+        if self._last is None or key != self._last_key or now - self._last >= self.interval:
+            self._last = now
+            self._last_key = key
+            return True
+        return False
@@ -1,26 +1,131 @@
 import requests
+import hashlib
 import os
+import re
 import stat
 import threading
 import json
+import time
 import zipfile
 from pathlib import Path
 from PySide6.QtCore import QObject, Signal
 
+from resources.connectivity import connectivity
+from resources.httpclient import client
+from resources.metrics import metrics
+
 GITHUB_API = "https://api.github.com"
+RELEASE_REPOS = {"yt-dlp": "yt-dlp/yt-dlp", "ffmpeg": "GyanD/codexffmpeg"}
+RELEASE_CACHE_TTL = 10 * 60
+DEFAULT_SEGMENTS = 4
+SEGMENTED_MIN_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+CHUNK_TARGET_SECONDS = 0.25
+EXTRACT_BUFFER_SIZE = 1024 * 1024
+CHECKSUM_FILES = ("SHA2-256SUMS", "SHA256SUMS", "sha256sums.txt")
+SHA256_RE = re.compile(r"^([0-9a-fA-F]{64})(?:\s+\*?(.+))?$")
+
+
+class ChecksumError(RuntimeError):
+    pass
+
+
+def _outcome(message, verified):
+    return message if verified else f"{message} without checksum verification (the release publishes no checksum)"
+
+
+def _parse_checksums(text, default_name=None):
+    sums = {}
+    for line in text.splitlines():
+        match = SHA256_RE.match(line.strip())
+        if not match:
+            continue
+        name = match.group(2) or default_name
+        if name:
+            sums[os.path.basename(name.strip())] = match.group(1).lower()
+    return sums
+
+
+def _hash_file(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(MAX_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest
+
+
+def _retries(response):
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def _copy_stream(response, f, on_chunk, digest=None):
+    chunk_size = MIN_CHUNK_SIZE
+    while True:
+        started = time.monotonic()
+        data = response.raw.read(chunk_size, decode_content=True)
+        if not data:
+            break
+        f.write(data)
+        if digest:
+            digest.update(data)
+        on_chunk(len(data))
+        elapsed = time.monotonic() - started
+        if elapsed > 0:
+            chunk_size = int(min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, len(data) / elapsed * CHUNK_TARGET_SECONDS)))
+
+
+class _ProgressReporter:
+    def __init__(self, signals, name, total):
+        self.signals = signals
+        self.name = name
+        self.total = total
+        self.downloaded = 0
+        self.retries = 0
+        self.started = time.monotonic()
+        self.first_byte = None
+        self._last_pct = -1
+        self._lock = threading.Lock()
+
+    def note_retries(self, count):
+        with self._lock:
+            self.retries += count
+
+    def add(self, nbytes):
+        with self._lock:
+            self.downloaded += nbytes
+            if nbytes and self.first_byte is None:
+                self.first_byte = time.monotonic() - self.started
+            if not self.total:
+                return
+            pct = min(100, int(self.downloaded * 100 / self.total))
+            if pct == self._last_pct:
+                return
+            self._last_pct = pct
+        try:
+            self.signals.progress.emit(self.name, pct)
+        except Exception:
+            pass
 
 class DependencySignals(QObject):
     progress = Signal(str, int)
     finished = Signal(str, bool, str)
+    done = Signal(str)
     info = Signal(str)
     error = Signal(str)
+    requirements = Signal(object)
 
 class DependencyManager:
-    def __init__(self, popup_manager, requirements_dir: Path, json_path: Path):
+    def __init__(self, popup_manager, requirements_dir: Path, json_path: Path, segments=DEFAULT_SEGMENTS):
         self.popup = popup_manager
+        self.segments = max(1, int(segments))
         self.req_dir = Path(requirements_dir)
         self.req_dir.mkdir(parents=True, exist_ok=True)
         self.json_path = Path(json_path)
+        self.cache_path = self.json_path.with_name("release_cache.json")
+        self.verified_path = self.json_path.with_name("verified_hashes.json")
+        self._json_lock = threading.Lock()
         if not self.json_path.exists():
             self._save_json({})
         self.signals = DependencySignals()
@@ -44,9 +149,75 @@ class DependencyManager:
         return data.get(app_name)
 
     def _json_set(self, app_name, published_at_iso):
-        data = self._load_json()
-        data[app_name] = published_at_iso
-        self._save_json(data)
+        with self._json_lock:
+            data = self._load_json()
+            data[app_name] = published_at_iso
+            self._save_json(data)
+
+    def _load_release_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _store_release(self, owner_repo, entry):
+        with self._json_lock:
+            data = self._load_release_cache()
+            data[owner_repo] = entry
+            tmp = self.cache_path.with_suffix(".tmp")
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4)
+                tmp.replace(self.cache_path)
+            except Exception:
+                pass
+
+    def _load_verified(self):
+        try:
+            with open(self.verified_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _record_verified(self, hashes):
+        with self._json_lock:
+            data = self._load_verified()
+            for path, sha256 in hashes.items():
+                st = path.stat()
+                data[path.name] = {"sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            tmp = self.verified_path.with_suffix(".tmp")
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4)
+                tmp.replace(self.verified_path)
+            except Exception:
+                pass
+
+    def _verify_installed(self, paths):
+        data = self._load_verified()
+        fresh = {}
+        for path in paths:
+            try:
+                st = path.stat()
+            except OSError:
+                return False
+            entry = data.get(path.name)
+            if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+                continue
+            sha256 = _hash_file(path).hexdigest()
+            if entry and entry.get("sha256") != sha256:
+                return False
+            fresh[path] = sha256
+        if fresh:
+            self._record_verified(fresh)
+        return True
+
+    def last_checked(self, name=None):
+        data = self._load_release_cache()
+        repos = [RELEASE_REPOS[name]] if name else RELEASE_REPOS.values()
+        times = [data[repo]["checked_at"] for repo in repos if repo in data]
+        return max(times) if times else None
 
     def check_existing_requirements(self):
         result = {}
@@ -56,19 +227,18 @@ class DependencyManager:
         ytd_name = "yt-dlp.exe" if os.name == "nt" else "yt-dlp"
 
         ffmpeg_files = [self.req_dir / ff_name, self.req_dir / ffprobe_name, self.req_dir / ffplay_name]
-        ffmpeg_exists = all(f.exists() for f in ffmpeg_files)
-        ytd_exists = (self.req_dir / ytd_name).exists()
-
-        result["ffmpeg"] = ffmpeg_exists
-        result["yt-dlp"] = ytd_exists
+        result["ffmpeg"] = self._verify_installed(ffmpeg_files)
+        result["yt-dlp"] = self._verify_installed([self.req_dir / ytd_name])
         return result
 
+    def refresh_requirements(self):
+        thread = threading.Thread(
+            target=lambda: self.signals.requirements.emit(self.check_existing_requirements()), daemon=True
+        )
+        thread.start()
+
     def _is_online(self):
-        try:
-            requests.get("https://api.github.com", timeout=5)
-            return True
-        except requests.RequestException:
-            return False
+        return connectivity.is_online()
 
     def install_dependency(self, name, progress_bar, button, finish_callback=None):
         thread = threading.Thread(target=self._install_thread, args=(name, progress_bar, button, finish_callback), daemon=True)
@@ -78,9 +248,12 @@ class DependencyManager:
         thread = threading.Thread(target=self._check_update_thread, args=(name, progress_bar, button, finish_callback), daemon=True)
         thread.start()
 
+    def check_all_dependencies(self, targets, finish_callback=None):
+        for name, (progress_bar, button) in targets.items():
+            self.check_update_dependency(name, progress_bar, button, finish_callback)
+
     def _install_thread(self, name, progress_bar, button, finish_callback):
         try:
-            button.setEnabled(False)
             if not self._is_online():
                 self.signals.error.emit("Error: No internet connection.")
                 if finish_callback:
@@ -88,52 +261,44 @@ class DependencyManager:
                 return
 
             if name == "yt-dlp":
-                release = self._github_latest_release("yt-dlp/yt-dlp")
-                asset = self._choose_asset(release.get("assets", []), want_keyword="yt-dlp")
-                if not asset:
-                    raise RuntimeError("yt-dlp asset not found")
-                url = asset["browser_download_url"]
+                release = self._github_latest_release(RELEASE_REPOS["yt-dlp"])
                 published_at = release.get("published_at")
-                dest = self.req_dir / ("yt-dlp.exe" if os.name == "nt" else "yt-dlp")
-                self._download_file(url, dest, name)
+                message = _outcome("downloaded", self._install_yt_dlp(release))
                 if published_at:
                     self._json_set("yt-dlp", published_at)
-                self.signals.finished.emit(name, True, "downloaded")
+                self.signals.finished.emit(name, True, message)
                 if finish_callback:
-                    finish_callback(name, True, "downloaded")
+                    finish_callback(name, True, message)
                 return
 
             if name == "ffmpeg":
-                release = self._github_latest_release("GyanD/codexffmpeg")
-                asset = self._choose_asset(release.get("assets", []), want_keyword="essentials_build")
-                if not asset:
-                    raise RuntimeError("ffmpeg essentials asset not found")
-                url = asset["browser_download_url"]
-                tmp_zip = self.req_dir / "ffmpeg_download.zip"
-                self._download_file(url, tmp_zip, name)
-                self._extract_and_copy_ffmpeg(tmp_zip)
-                try:
-                    tmp_zip.unlink()
-                except Exception:
-                    pass
+                release = self._github_latest_release(RELEASE_REPOS["ffmpeg"])
+                message = _outcome("downloaded", self._install_ffmpeg(release))
                 published_at = release.get("published_at") or release.get("tag_name")
                 if published_at:
                     self._json_set("ffmpeg", published_at)
-                self.signals.finished.emit(name, True, "downloaded")
+                self.signals.finished.emit(name, True, message)
                 if finish_callback:
-                    finish_callback(name, True, "downloaded")
+                    finish_callback(name, True, message)
                 return
 
+        except requests.ConnectionError as e:
+            self.signals.error.emit("Error: No internet connection.")
+            if finish_callback:
+                finish_callback(name, False, str(e))
+        except ChecksumError as e:
+            self.signals.error.emit(f"Error: {name} failed checksum verification, the previous version was kept.")
+            if finish_callback:
+                finish_callback(name, False, str(e))
         except Exception as e:
             self.signals.error.emit("Error while downloading")
             if finish_callback:
                 finish_callback(name, False, str(e))
         finally:
-            button.setEnabled(True)
+            self.signals.done.emit(name)
 
     def _check_update_thread(self, name, progress_bar, button, finish_callback):
         try:
-            button.setEnabled(False)
             if not self._is_online():
                 self.signals.error.emit("Error: No internet connection.")
                 if finish_callback:
@@ -141,66 +306,123 @@ class DependencyManager:
                 return
 
             if name == "yt-dlp":
-                release = self._github_latest_release("yt-dlp/yt-dlp")
+                release = self._github_latest_release(RELEASE_REPOS["yt-dlp"])
                 published_at = release.get("published_at")
                 stored = self._json_get("yt-dlp")
                 if stored and published_at and stored == published_at:
-                    self.signals.info.emit("No updates found")
+                    self.signals.info.emit(f"{name}: no updates found")
                     if finish_callback:
                         finish_callback(name, True, "no-updates")
                 else:
-                    asset = self._choose_asset(release.get("assets", []), want_keyword="yt-dlp")
-                    if not asset:
-                        raise RuntimeError("yt-dlp asset not found")
-                    url = asset["browser_download_url"]
-                    dest = self.req_dir / ("yt-dlp.exe" if os.name == "nt" else "yt-dlp")
-                    self._download_file(url, dest, name)
+                    message = _outcome("updated", self._install_yt_dlp(release))
                     if published_at:
                         self._json_set("yt-dlp", published_at)
-                    self.signals.finished.emit(name, True, "updated")
+                    self.signals.finished.emit(name, True, message)
                     if finish_callback:
-                        finish_callback(name, True, "updated")
+                        finish_callback(name, True, message)
                 return
 
             if name == "ffmpeg":
-                release = self._github_latest_release("GyanD/codexffmpeg")
+                release = self._github_latest_release(RELEASE_REPOS["ffmpeg"])
                 published_at = release.get("published_at") or release.get("tag_name")
                 stored = self._json_get("ffmpeg")
                 if stored and published_at and stored == published_at:
-                    self.signals.info.emit("No updates found")
+                    self.signals.info.emit(f"{name}: no updates found")
                     if finish_callback:
                         finish_callback(name, True, "no-updates")
                 else:
-                    asset = self._choose_asset(release.get("assets", []), want_keyword="essentials_build")
-                    if not asset:
-                        raise RuntimeError("ffmpeg essentials asset not found")
-                    url = asset["browser_download_url"]
-                    tmp_zip = self.req_dir / "ffmpeg_download.zip"
-                    self._download_file(url, tmp_zip, name)
-                    self._extract_and_copy_ffmpeg(tmp_zip)
-                    try:
-                        tmp_zip.unlink()
-                    except Exception:
-                        pass
+                    message = _outcome("updated", self._install_ffmpeg(release))
                     if published_at:
                         self._json_set("ffmpeg", published_at)
-                    self.signals.finished.emit(name, True, "updated")
+                    self.signals.finished.emit(name, True, message)
                     if finish_callback:
-                        finish_callback(name, True, "updated")
+                        finish_callback(name, True, message)
                 return
 
+        except requests.ConnectionError as e:
+            self.signals.error.emit("Error: No internet connection.")
+            if finish_callback:
+                finish_callback(name, False, str(e))
+        except ChecksumError as e:
+            self.signals.error.emit(f"Error: {name} failed checksum verification, the previous version was kept.")
+            if finish_callback:
+                finish_callback(name, False, str(e))
         except Exception as e:
             self.signals.error.emit("Error while updating")
             if finish_callback:
                 finish_callback(name, False, str(e))
         finally:
-            button.setEnabled(True)
+            self.signals.done.emit(name)
+
+    def _github_latest_release(self, owner_repo, max_age=RELEASE_CACHE_TTL):
+        cached = self._load_release_cache().get(owner_repo)
+        now = time.time()
+        if cached and now - cached.get("checked_at", 0) < max_age:
+            return cached["release"]
 
-    def _github_latest_release(self, owner_repo):
         url = f"{GITHUB_API}/repos/{owner_repo}/releases/latest"
-        r = requests.get(url, timeout=20)
+        headers = {"Accept": "application/vnd.github+json"}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        try:
+            r = client.get(url, timeout=20, headers=headers)
+        except requests.ConnectionError:
+            connectivity.mark_offline()
+            raise
+        connectivity.mark_online()
+        if r.status_code == 304 and cached:
+            cached["checked_at"] = now
+            self._store_release(owner_repo, cached)
+            return cached["release"]
         r.raise_for_status()
-        return r.json()
+        data = r.json()
+        release = {
+            "tag_name": data.get("tag_name"),
+            "published_at": data.get("published_at"),
+            "assets": [
+                {"name": a.get("name"), "browser_download_url": a.get("browser_download_url"), "size": a.get("size")}
+                for a in data.get("assets", [])
+            ],
+        }
+        self._store_release(owner_repo, {"etag": r.headers.get("ETag"), "checked_at": now, "release": release})
+        return release
+
+    def _release_sha256(self, release, asset):
+        assets = {a.get("name"): a for a in release.get("assets", [])}
+        for checksum_name in CHECKSUM_FILES + (asset["name"] + ".sha256",):
+            checksum_asset = assets.get(checksum_name)
+            if not checksum_asset:
+                continue
+            r = client.get(checksum_asset["browser_download_url"], timeout=30)
+            r.raise_for_status()
+            expected = _parse_checksums(r.text, asset["name"]).get(asset["name"])
+            if expected:
+                return expected
+        return None
+
+    def _install_yt_dlp(self, release):
+        asset = self._choose_asset(release.get("assets", []), want_keyword="yt-dlp")
+        if not asset:
+            raise RuntimeError("yt-dlp asset not found")
+        dest = self.req_dir / ("yt-dlp.exe" if os.name == "nt" else "yt-dlp")
+        expected = self._release_sha256(release, asset)
+        sha256 = self._download_file(asset["browser_download_url"], dest, "yt-dlp", expected)
+        self._record_verified({dest: sha256})
+        return expected is not None
+
+    def _install_ffmpeg(self, release):
+        asset = self._choose_asset(release.get("assets", []), want_keyword="essentials_build")
+        if not asset:
+            raise RuntimeError("ffmpeg essentials asset not found")
+        tmp_zip = self.req_dir / "ffmpeg_download.zip"
+        expected = self._release_sha256(release, asset)
+        self._download_file(asset["browser_download_url"], tmp_zip, "ffmpeg", expected)
+        self._extract_and_copy_ffmpeg(tmp_zip)
+        try:
+            tmp_zip.unlink()
+        except Exception:
+            pass
+        return expected is not None
 
     def _choose_asset(self, assets, want_keyword="ffmpeg"):
         for a in assets:
@@ -209,38 +431,240 @@ class DependencyManager:
                 return a
         return None
 
-    def _download_file(self, url, dest_path: Path, name):
-        with requests.get(url, stream=True, timeout=60) as r:
+    def _download_file(self, url, dest_path: Path, name, expected_sha256=None):
+        started = time.monotonic()
+        progress = _ProgressReporter(self.signals, name, 0)
+        status = "failed"
+        try:
+            sha256 = self._fetch_file(url, dest_path, progress, expected_sha256)
+            status = "ok" if expected_sha256 else "unverified"
+            return sha256
+        except ChecksumError:
+            status = "checksum_mismatch"
+            raise
+        finally:
+            metrics.record_dependency(
+                name, status, time.monotonic() - started, progress.downloaded, progress.first_byte, progress.retries
+            )
+
+    def _fetch_file(self, url, dest_path: Path, progress, expected_sha256=None):
+        tmp = dest_path.with_suffix(dest_path.suffix + ".part")
+        meta_path = tmp.with_suffix(tmp.suffix + ".json")
+        meta = self._load_part_meta(meta_path)
+        try:
+            head = client.head(url, allow_redirects=True, timeout=30)
+        except requests.ConnectionError:
+            connectivity.mark_offline()
+            raise
+        progress.note_retries(_retries(head))
+        head.raise_for_status()
+        final_url = head.url
+        total = int(head.headers.get("Content-Length", 0) or 0)
+        validator = head.headers.get("ETag") or head.headers.get("Last-Modified")
+        accepts_ranges = head.headers.get("Accept-Ranges", "").lower() == "bytes"
+
+        if meta.get("validator") != validator or meta.get("total") != total:
+            self._discard_partial(tmp, meta_path)
+        self._save_part_meta(meta_path, {"validator": validator, "total": total})
+
+        progress.total = total
+        segment_paths = self._segment_paths(tmp)
+        segmented = any(p.exists() for p in segment_paths) or (
+            self.segments > 1 and accepts_ranges and total >= SEGMENTED_MIN_SIZE and not tmp.exists()
+        )
+        digest = hashlib.sha256()
+        if segmented and accepts_ranges and total:
+            self._download_segmented(final_url, tmp, total, progress, digest)
+        else:
+            self._download_single(final_url, tmp, validator if accepts_ranges else None, progress, digest)
+        sha256 = digest.hexdigest()
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            self._discard_partial(tmp, meta_path)
+            raise ChecksumError(f"{dest_path.name}: expected sha256 {expected_sha256}, got {sha256}")
+        tmp.replace(dest_path)
+        try:
+            meta_path.unlink()
+        except OSError:
+            pass
+        return sha256
+
+    def _load_part_meta(self, meta_path: Path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_part_meta(self, meta_path: Path, meta):
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except OSError:
+            pass
+
+    def _segment_paths(self, tmp: Path):
+        return [tmp.with_suffix(tmp.suffix + f".{i}") for i in range(self.segments)]
+
+    def _discard_partial(self, tmp: Path, meta_path: Path):
+        for path in [tmp, meta_path] + list(tmp.parent.glob(tmp.name + ".[0-9]*")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _download_single(self, url, tmp: Path, validator, progress, digest):
+        offset = tmp.stat().st_size if tmp.exists() else 0
+        headers = {}
+        if offset and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        else:
+            offset = 0
+        try:
+            response = client.get(url, stream=True, timeout=60, headers=headers)
+        except requests.ConnectionError:
+            connectivity.mark_offline()
+            raise
+        progress.note_retries(_retries(response))
+        with response as r:
+            if offset and r.status_code == 416 and progress.total and offset == progress.total:
+                _hash_file(tmp, digest)
+                progress.add(offset)
+                return
             r.raise_for_status()
-            total = int(r.headers.get("Content-Length", 0) or 0)
-            downloaded = 0
-            tmp = dest_path.with_suffix(dest_path.suffix + ".part")
-            with open(tmp, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    if not chunk:
-                        continue
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total:
-                        pct = int(downloaded * 100 / total)
-                        try:
-                            self.signals.progress.emit(name, pct)
-                        except Exception:
-                            pass
-            tmp.replace(dest_path)
+            if r.status_code != 206:
+                offset = 0
+            if not progress.total:
+                progress.total = offset + int(r.headers.get("Content-Length", 0) or 0)
+            if offset:
+                _hash_file(tmp, digest)
+            progress.add(offset)
+            with open(tmp, "ab" if offset else "wb") as f:
+                _copy_stream(r, f, progress.add, digest)
+
+    def _download_segmented(self, url, tmp: Path, total, progress, digest):
+        paths = self._segment_paths(tmp)
+        size = -(-total // len(paths))
+        ranges = [(i * size, min(total, (i + 1) * size) - 1) for i in range(len(paths))]
+        errors = []
+
+        def fetch(path, first, last):
+            try:
+                have = path.stat().st_size if path.exists() else 0
+                if have > last - first + 1:
+                    path.unlink()
+                    have = 0
+                progress.add(have)
+                if first + have > last:
+                    return
+                headers = {"Range": f"bytes={first + have}-{last}"}
+                with client.get(url, stream=True, timeout=60, headers=headers) as r:
+                    progress.note_retries(_retries(r))
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise RuntimeError("Server ignored the byte range request")
+                    with open(path, "ab") as f:
+                        _copy_stream(r, f, progress.add)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=fetch, args=(path, first, last), daemon=True)
+                   for path, (first, last) in zip(paths, ranges)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            if any(isinstance(e, requests.ConnectionError) for e in errors):
+                connectivity.mark_offline()
+            raise errors[0]
+
+        for path, (first, last) in zip(paths, ranges):
+            if path.stat().st_size != last - first + 1:
+                raise RuntimeError(f"Incomplete segment {path.name}")
+        with open(tmp, "wb") as out:
+            for path in paths:
+                with open(path, "rb") as src:
+                    while chunk := src.read(MAX_CHUNK_SIZE):
+                        out.write(chunk)
+                        digest.update(chunk)
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
 
     def _extract_and_copy_ffmpeg(self, zip_path: Path):
+        wanted = ["ffmpeg.exe", "ffprobe.exe", "ffplay.exe"] if os.name == "nt" else ["ffmpeg", "ffprobe", "ffplay"]
+        members = {}
         with zipfile.ZipFile(zip_path, "r") as z:
-            bin_files = [f for f in z.namelist() if "/bin/" in f]
-            wanted = ["ffmpeg.exe", "ffprobe.exe", "ffplay.exe"] if os.name == "nt" else ["ffmpeg", "ffprobe", "ffplay"]
-
-            for f in bin_files:
-                fname = os.path.basename(f)
-                if fname in wanted:
-                    dest = self.req_dir / fname
-                    with z.open(f) as src, open(dest, "wb") as dst:
-                        dst.write(src.read())
-                    try:
-                        dest.chmod(dest.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
-                    except Exception:
-                        pass
\ No newline at end of file
+            for info in z.infolist():
+                fname = os.path.basename(info.filename)
+                if fname in wanted and "/bin/" in info.filename:
+                    members[fname] = info.filename
+                    if len(members) == len(wanted):
+                        break
+        missing = [f for f in wanted if f not in members]
+        if missing:
+            raise RuntimeError(f"ffmpeg archive is missing {', '.join(missing)}")
+
+        staged = {fname: self.req_dir / (fname + ".new") for fname in wanted}
+        hashes = {}
+        errors = []
+
+        def extract(fname):
+            try:
+                digest = hashlib.sha256()
+                with zipfile.ZipFile(zip_path, "r") as z, z.open(members[fname]) as src, open(staged[fname], "wb") as dst:
+                    while chunk := src.read(EXTRACT_BUFFER_SIZE):
+                        dst.write(chunk)
+                        digest.update(chunk)
+                hashes[fname] = digest.hexdigest()
+                dest = staged[fname]
+                try:
+                    dest.chmod(dest.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+                except Exception:
+                    pass
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=extract, args=(fname,), daemon=True) for fname in wanted]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            for path in staged.values():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            raise errors[0]
+
+        backups = []
+        installed = []
+        try:
+            for fname, path in staged.items():
+                dest = self.req_dir / fname
+                if dest.exists():
+                    backup = dest.with_name(fname + ".bak")
+                    os.replace(dest, backup)
+                    backups.append((backup, dest))
+                os.replace(path, dest)
+                installed.append(dest)
+        except Exception:
+            restored = {dest for _, dest in backups}
+            for path in [dest for dest in installed if dest not in restored] + list(staged.values()):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            for backup, dest in backups:
+                os.replace(backup, dest)
+            raise
+        for backup, _ in backups:
+            try:
+                backup.unlink()
+            except OSError:
+                pass
+        self._record_verified({self.req_dir / fname: sha256 for fname, sha256 in hashes.items()})
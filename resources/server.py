@@ -0,0 +1,302 @@
+import hmac
+import json
+import os
+import queue
+import re
+import secrets
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from resources.core import executable_name
+from resources.httpclient import client
+from resources.jobspec import job_options
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+EVENT_BUFFER = 1000
+MAX_BODY = 1024 * 1024
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+TOKEN_BYTES = 24
+
+JOB_PATH_RE = re.compile(r"^/jobs/(\d+)$")
+
+
+class _EventHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=EVENT_BUFFER)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    server_version = "GUIVideoDownloader/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text, content_type="text/plain; charset=utf-8"):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send_json(status, {"error": message})
+
+    def _authorized(self):
+        if self.headers.get("Origin") is not None:
+            self._error(403, "Cross-origin requests are not allowed.")
+            return False
+        token = self.server.service.token
+        if not token:
+            return True
+        if hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {token}"):
+            return True
+        self._error(401, "Missing or invalid token.")
+        return False
+
+    def _json_body(self):
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type == "application/json":
+            return True
+        self._error(415, "Content-Type must be application/json.")
+        return False
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise ValueError("Request body too large.")
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw or b"null")
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        service = self.server.service
+        if self.path == "/jobs":
+            self._send_json(200, [job.to_dict() for job in service.core.queue.jobs()])
+            return
+        if self.path == "/events":
+            self._stream_events()
+            return
+        if self.path == "/dependencies":
+            self._send_json(200, service.dependencies())
+            return
+        if self.path == "/network":
+            self._send_json(200, client.stats())
+            return
+        if self.path == "/pipeline":
+            self._send_json(200, service.core.pipeline_stats())
+            return
+        if self.path == "/metrics":
+            self._send_text(200, service.core.metrics_text(), METRICS_CONTENT_TYPE)
+            return
+        match = JOB_PATH_RE.match(self.path)
+        if match:
+            job = service.core.queue.get(int(match.group(1)))
+            if job is None:
+                self._error(404, "No such job.")
+            else:
+                self._send_json(200, job.to_dict(detail=True))
+            return
+        self._error(404, "Not found.")
+
+    def do_POST(self):
+        if not self._authorized() or not self._json_body():
+            return
+        if self.path != "/jobs":
+            self._error(404, "Not found.")
+            return
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._error(400, str(e) or "Invalid JSON.")
+            return
+        specs = payload if isinstance(payload, list) else [payload]
+        accepted, rejected = [], []
+        for spec in specs:
+            try:
+                accepted.append(self.server.service.submit(spec).to_dict())
+            except ValueError as e:
+                rejected.append({"spec": spec, "error": str(e)})
+        if not accepted:
+            self._send_json(400, {"accepted": accepted, "rejected": rejected})
+            return
+        self._send_json(201, {"accepted": accepted, "rejected": rejected})
+
+    def do_PATCH(self):
+        if not self._authorized() or not self._json_body():
+            return
+        match = JOB_PATH_RE.match(self.path)
+        if not match:
+            self._error(404, "Not found.")
+            return
+        try:
+            payload = self._read_json()
+            priority = int(payload["priority"])
+        except (ValueError, TypeError, KeyError):
+            self._error(400, "Expected {\"priority\": <int>}.")
+            return
+        job_id = int(match.group(1))
+        if not self.server.service.core.set_job_priority(job_id, priority):
+            self._error(409, "Only queued jobs can be reprioritized.")
+            return
+        self._send_json(200, self.server.service.core.queue.get(job_id).to_dict())
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        match = JOB_PATH_RE.match(self.path)
+        if not match:
+            self._error(404, "Not found.")
+            return
+        job_id = int(match.group(1))
+        job = self.server.service.core.queue.get(job_id)
+        if job is None:
+            self._error(404, "No such job.")
+            return
+        self.server.service.core.cancel_job(job_id)
+        self._send_json(200, job.to_dict())
+
+    def _stream_events(self):
+        hub = self.server.service.events
+        q = hub.subscribe()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for job in self.server.service.core.queue.jobs():
+                self.wfile.write(f"event: job\ndata: {json.dumps(job.to_dict())}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            while not self.server.service.stopping.is_set():
+                try:
+                    event = q.get(timeout=15)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                self.wfile.write(f"event: job\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            hub.unsubscribe(q)
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = super().get_request()
+            return request, ("unix", 0)
+else:
+    _UnixServer = None
+
+
+class JobService:
+    def __init__(self, core, default_path=".", token=None, allow_custom_args=False):
+        self.core = core
+        self.default_path = default_path
+        self.token = token if token is not None else secrets.token_urlsafe(TOKEN_BYTES)
+        self.allow_custom_args = allow_custom_args
+        self.events = _EventHub()
+        self.stopping = threading.Event()
+        self.httpd = None
+        core.add_listener(lambda job: self.events.publish(job.to_dict()))
+
+    def submit(self, spec, trusted=False):
+        if isinstance(spec, str):
+            spec = {"url": spec}
+        if not isinstance(spec, dict):
+            raise ValueError("A job must be a URL or an object with a url field.")
+        url = spec.get("url") or ""
+        download_path = spec.get("download_path") or self.default_path
+        if not isinstance(url, str) or not isinstance(download_path, str):
+            raise ValueError("Fields url and download_path must be strings.")
+        options = job_options(spec)
+        if not trusted:
+            if options.get("custom_arg") and not self.allow_custom_args:
+                raise ValueError("Custom yt-dlp arguments are not accepted over the API.")
+            download_path = self.output_path(download_path)
+        return self.core.download_video(url, download_path, **options)
+
+    def output_path(self, download_path):
+        base = Path(self.default_path).resolve()
+        path = (base / download_path).resolve()
+        if path != base and base not in path.parents:
+            raise ValueError(f"download_path must be inside {base}.")
+        return str(path)
+
+    def dependencies(self):
+        ffmpeg_dir = self.core.ffmpeg_dir
+        return {
+            "ffmpeg": all((ffmpeg_dir / executable_name(name)).is_file() for name in ("ffmpeg", "ffprobe")),
+            "yt-dlp": self.core.yt_dlp_path.is_file(),
+        }
+
+    def bind(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+        if socket_path:
+            if _UnixServer is None:
+                raise RuntimeError("Unix sockets are not supported on this platform.")
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.httpd = _UnixServer(socket_path, JobRequestHandler)
+        else:
+            self.httpd = _TCPServer((host, port), JobRequestHandler)
+        self.httpd.service = self
+        return self.httpd
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.stopping.set()
+
+    def shutdown(self):
+        self.stopping.set()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
@@ -0,0 +1,186 @@
+import importlib.util
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from resources.progress import ProgressRecord, ProgressThrottle
+
+SUBPROCESS = "subprocess"
+IN_PROCESS = "in-process"
+ENGINES = (SUBPROCESS, IN_PROCESS)
+
+DEFAULT_ENGINE_WORKERS = 2
+RATE_POLL_INTERVAL = 1.0
+
+
+def is_available():
+    try:
+        return importlib.util.find_spec("yt_dlp") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class _QueueLogger:
+    def __init__(self, job_id, events):
+        self.job_id = job_id
+        self.events = events
+
+    def debug(self, msg):
+        if not msg.startswith("[debug] "):
+            self.events.put((self.job_id, "output", msg))
+
+    def info(self, msg):
+        self.events.put((self.job_id, "output", msg))
+
+    def warning(self, msg):
+        self.events.put((self.job_id, "output", f"WARNING: {msg}"))
+
+    def error(self, msg):
+        self.events.put((self.job_id, "output", msg))
+
+
+def _warm_up():
+    import yt_dlp
+    import yt_dlp.extractor
+
+
+def _download(ydl, parsed):
+    from yt_dlp.utils import expand_path
+
+    if parsed.options.load_info_filename is not None:
+        return ydl.download_with_info_file(expand_path(parsed.options.load_info_filename))
+    return ydl.download(parsed.urls)
+
+
+def _run_download(job_id, argv, events, cancelled, rates):
+    import yt_dlp
+    from yt_dlp.utils import DownloadCancelled
+
+    parsed = yt_dlp.parse_options(argv)
+    ydl_opts = dict(parsed.ydl_opts)
+    throttle = ProgressThrottle()
+    ydl = None
+    rate_checked = 0.0
+
+    def progress_hook(d):
+        nonlocal rate_checked
+        if job_id in cancelled:
+            raise DownloadCancelled()
+        now = time.monotonic()
+        if ydl is not None and now - rate_checked >= RATE_POLL_INTERVAL:
+            rate_checked = now
+            ydl.params["ratelimit"] = rates.get(job_id, ydl.params.get("ratelimit"))
+        record = ProgressRecord.from_dict("download", d)
+        if throttle.ready(record):
+            events.put((job_id, "progress", record))
+
+    def postprocessor_hook(d):
+        if job_id in cancelled:
+            raise DownloadCancelled()
+        events.put((job_id, "progress", ProgressRecord.from_dict("postprocess", d)))
+
+    ydl_opts["progress_hooks"] = list(ydl_opts.get("progress_hooks") or []) + [progress_hook]
+    ydl_opts["postprocessor_hooks"] = list(ydl_opts.get("postprocessor_hooks") or []) + [postprocessor_hook]
+    ydl_opts["logger"] = _QueueLogger(job_id, events)
+    ydl_opts["noprogress"] = True
+    ydl_opts.pop("progress_template", None)
+
+    try:
+        ydl = yt_dlp.YoutubeDL(ydl_opts)
+        with ydl:
+            return _download(ydl, parsed)
+    except DownloadCancelled:
+        return 1
+    except yt_dlp.utils.DownloadError:
+        return 1
+
+
+class _JobHandle:
+    def __init__(self, engine, job_id):
+        self.engine = engine
+        self.job_id = job_id
+
+    def terminate(self):
+        self.engine.cancel(self.job_id)
+
+    def set_rate(self, rate):
+        self.engine.set_rate(self.job_id, rate)
+
+
+class InProcessEngine:
+    def __init__(self, workers=DEFAULT_ENGINE_WORKERS):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._manager = None
+        self._events = None
+        self._cancelled = None
+        self._rates = None
+        self._listeners = {}
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pool is not None:
+                return
+            ctx = multiprocessing.get_context("spawn")
+            self._manager = ctx.Manager()
+            self._events = self._manager.Queue()
+            self._cancelled = self._manager.dict()
+            self._rates = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx, initializer=_warm_up)
+            threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        events = self._events
+        while True:
+            try:
+                item = events.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, kind, payload = item
+            listener = self._listeners.get(job_id)
+            if listener:
+                try:
+                    listener(kind, payload)
+                except Exception:
+                    pass
+
+    def handle(self, job_id):
+        return _JobHandle(self, job_id)
+
+    def run(self, job_id, argv, listener):
+        self._ensure_started()
+        self._listeners[job_id] = listener
+        try:
+            future = self._pool.submit(_run_download, job_id, list(argv), self._events, self._cancelled, self._rates)
+            return future.result()
+        finally:
+            self._listeners.pop(job_id, None)
+            try:
+                self._cancelled.pop(job_id, None)
+                self._rates.pop(job_id, None)
+            except Exception:
+                pass
+
+    def set_rate(self, job_id, rate):
+        if self._rates is not None:
+            self._rates[job_id] = rate
+
+    def cancel(self, job_id):
+        if self._cancelled is not None:
+            self._cancelled[job_id] = True
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is None:
+                return
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            try:
+                self._events.put(None)
+                self._manager.shutdown()
+            except Exception:
+                pass
+            self._pool = None
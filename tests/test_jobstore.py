@@ -0,0 +1,52 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from resources.jobqueue import QUEUED, DownloadJob
+from resources.jobstore import JobStore
+
+
+class JobStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "jobs.sqlite3"
+        self.store = JobStore(self.path, flush_interval=60)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def job(self, job_id):
+        job = DownloadJob(f"https://example.com/{job_id}", self.tmp.name, job_id=job_id)
+        job.state = QUEUED
+        return job
+
+    def failed_flush(self):
+        with mock.patch.object(self.store, "_connect", side_effect=sqlite3.OperationalError("database is locked")):
+            self.store.flush()
+
+    def test_failed_flush_keeps_deletions(self):
+        for job_id in (1, 2):
+            self.store.record(self.job(job_id))
+        self.store.flush()
+        self.store.forget([1])
+        self.failed_flush()
+        self.assertEqual([row["id"] for row in self.store.interrupted()], [2])
+
+    def test_failed_flush_keeps_newer_changes(self):
+        self.store.record(self.job(1))
+        self.store.record(self.job(2))
+        self.store.flush()
+        self.store.forget([1])
+        self.store.record(self.job(3))
+        with mock.patch.object(self.store, "_connect", side_effect=sqlite3.OperationalError("database is locked")):
+            self.store.flush()
+            self.store.record(self.job(1))
+            self.store.forget([3])
+        self.assertEqual([row["id"] for row in self.store.interrupted()], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
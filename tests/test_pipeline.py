@@ -0,0 +1,132 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from benchmarks import pipeline as bench
+from resources.archive import DownloadArchive
+from resources.connectivity import connectivity
+from resources.core import DownloadCore
+from resources.jobqueue import PROCESSING, DownloadJob
+from resources.jobspec import JobSpec
+from resources.jobstore import JobStore
+from resources.metrics import MetricsRegistry
+
+MEDIA = {"size": 64 * 1024, "segments": 2, "segment_size": 1024, "rate": 0, "dependency_size": 1024}
+
+
+class PipelineArchiveTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.media, cls.base = bench.start_server(dict(MEDIA))
+        cls.urls = connectivity.urls
+        connectivity.urls = (cls.base,)
+
+    @classmethod
+    def tearDownClass(cls):
+        connectivity.urls = cls.urls
+        cls.media.shutdown()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.tools = self.dir / "tools"
+        self.tools.mkdir()
+        bench.make_tools(self.tools)
+        self.broken = self.dir / "broken"
+        self.broken.mkdir()
+        (self.broken / "ffmpeg").write_text("#!/bin/sh\nexit 1\n")
+        (self.broken / "ffmpeg").chmod(0o755)
+        (self.broken / "ffprobe").symlink_to(self.tools / "ffprobe")
+        self.output = self.dir / "out"
+        self.archive_path = self.dir / "archive.txt"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def core(self, ffmpeg_dir=None, yt_dlp_path=None, store=None):
+        return DownloadCore(
+            yt_dlp_path=yt_dlp_path or self.tools / "yt-dlp", ffmpeg_dir=ffmpeg_dir or self.tools,
+            archive=DownloadArchive(self.archive_path), store=store, metrics=MetricsRegistry()
+        )
+
+    def run_job(self, core, url):
+        job = core.download_video(url, str(self.output))
+        deadline = time.monotonic() + 30
+        while not job.finished and time.monotonic() < deadline:
+            time.sleep(0.05)
+        core.shutdown()
+        return job
+
+    def test_archive_is_written_after_post_processing(self):
+        url = f"{self.base}/media/clip1.mp4"
+        core = self.core(ffmpeg_dir=self.broken)
+        job = self.run_job(core, url)
+        self.assertEqual(job.state, "Failed")
+        self.assertFalse(self.archive_path.exists())
+        self.assertEqual(list(self.dir.glob("archive.txt.*.pending")), [])
+        cmd = core.build_command(job)
+        self.assertEqual(cmd[cmd.index("--download-archive") + 1], str(core.archive.pending_path(job.id)))
+
+        job = self.run_job(self.core(), url)
+        self.assertEqual(job.state, "Done", job.message)
+        self.assertEqual(self.archive_path.read_text(), "generic clip1\n")
+        self.assertEqual([p.name for p in self.output.iterdir()], ["Clip clip1 [clip1].mp4"])
+        self.assertIn("generic clip1", DownloadArchive(self.archive_path))
+
+        core = self.core()
+        job = self.run_job(core, url)
+        self.assertEqual(job.state, "Done", job.message)
+        self.assertTrue(any("has already been recorded in the archive" in line for line in core.console.drain()[0]))
+        self.assertEqual(self.archive_path.read_text(), "generic clip1\n")
+        self.assertEqual([p.name for p in self.output.iterdir()], ["Clip clip1 [clip1].mp4"])
+        self.assertEqual(list(self.dir.glob("archive.txt.*.pending")), [])
+
+    def test_pending_archive_is_per_job(self):
+        archive = DownloadArchive(self.archive_path)
+        self.assertNotEqual(archive.pending_path(1), archive.pending_path(2))
+
+    def test_restored_job_resumes_post_processing(self):
+        url = "https://example.com/watch/v1"
+        self.output.mkdir()
+        audio = self.output / "Clip v1 [v1].f140.m4a"
+        video = self.output / "Clip v1 [v1].f399.mp4"
+        audio.write_bytes(b"a" * 10)
+        video.write_bytes(b"v" * 10)
+        archive = DownloadArchive(self.archive_path)
+        archive.pending_path(1).write_text("generic v1\n")
+        store = JobStore(self.dir / "jobs.sqlite3")
+        spec = JobSpec.from_options(url, str(self.output))
+        job = DownloadJob(url, spec.download_path, options=spec.options(), job_id=1)
+        job.state = PROCESSING
+        job.files = {str(audio), str(video)}
+        store.record(job)
+        store.close()
+
+        core = self.core(yt_dlp_path=self.dir / "missing-yt-dlp", store=JobStore(self.dir / "jobs.sqlite3"))
+        restored = core.restore()
+        self.assertEqual(len(restored), 1)
+        deadline = time.monotonic() + 30
+        while not restored[0].finished and time.monotonic() < deadline:
+            time.sleep(0.05)
+        core.shutdown()
+        self.assertEqual(restored[0].state, "Done", restored[0].message)
+        merged = self.output / "Clip v1 [v1].mp4"
+        self.assertEqual([p.name for p in self.output.iterdir()], [merged.name])
+        self.assertEqual(merged.read_bytes(), b"v" * 10 + b"a" * 10)
+        self.assertEqual(self.archive_path.read_text(), "generic v1\n")
+
+    def test_audio_only_falls_back_to_combined_formats(self):
+        spec = JobSpec.from_options(f"{self.base}/media/clip2.mp4", str(self.output), {"audio_only": True})
+        core = self.core()
+        cmd = core.command_for(spec)
+        core.shutdown()
+        self.assertEqual(cmd[cmd.index("-f") + 1], "ba/b")
+
+    def test_relative_download_path(self):
+        spec = JobSpec.from_options("https://example.com/v", "downloads")
+        self.assertTrue(Path(spec.download_path).is_absolute())
+
+
+if __name__ == "__main__":
+    unittest.main()
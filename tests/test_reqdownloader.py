@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import io
+import threading
+import unittest
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from resources.reqdownloader import DependencyManager
+
+RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)")
+CONTENT = bytes(range(256)) * 4096
+ETAG = '"v1"'
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve()
+
+    def _serve(self, head=False):
+        server = self.server
+        server.requests.append((self.command, self.headers.get("Range"), self.headers.get("If-Range")))
+        content = server.files.get(self.path, server.content)
+        size = len(content)
+        match = RANGE_RE.match(self.headers.get("Range") or "")
+        if_range = self.headers.get("If-Range")
+        if match and if_range and if_range != server.etag:
+            match = None
+        if match and int(match.group(1)) >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        first, last = 0, size - 1
+        if match:
+            first = int(match.group(1))
+            last = min(size - 1, int(match.group(2))) if match.group(2) else size - 1
+        self.send_response(206 if match else 200)
+        self.send_header("Content-Length", str(last - first + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", server.head_etag or server.etag)
+        if match:
+            self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+        self.end_headers()
+        if not head:
+            self.wfile.write(content[first:last + 1])
+
+
+class LocalServerTest(unittest.TestCase):
+    def setUp(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.content = CONTENT
+        self.httpd.etag = ETAG
+        self.httpd.head_etag = None
+        self.httpd.files = {}
+        self.httpd.requests = []
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/yt-dlp"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.dest = self.dir / "req" / "yt-dlp"
+        self.part = self.dest.with_name("yt-dlp.part")
+        self.meta = self.dest.with_name("yt-dlp.part.json")
+        self.sha256 = hashlib.sha256(CONTENT).hexdigest()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.tmp.cleanup()
+
+    def manager(self, segments=1):
+        return DependencyManager(None, self.dir / "req", self.dir / "version_info.json", segments=segments)
+
+
+class DownloadFileTest(LocalServerTest):
+    def write_meta(self, validator=ETAG):
+        self.meta.write_text(json.dumps({"validator": validator, "total": len(CONTENT)}), encoding="utf-8")
+
+    def gets(self):
+        return [(r, i) for method, r, i in self.httpd.requests if method == "GET"]
+
+    def test_resumes_single_part(self):
+        manager = self.manager()
+        self.part.write_bytes(CONTENT[:100000])
+        self.write_meta()
+        sha256 = manager._download_file(self.url, self.dest, "yt-dlp", self.sha256)
+        self.assertEqual(sha256, self.sha256)
+        self.assertEqual(self.dest.read_bytes(), CONTENT)
+        self.assertEqual(self.gets(), [("bytes=100000-", ETAG)])
+        self.assertFalse(self.part.exists())
+        self.assertFalse(self.meta.exists())
+
+    def test_resumes_segmented_parts(self):
+        manager = self.manager(segments=4)
+        size = -(-len(CONTENT) // 4)
+        self.part.with_name("yt-dlp.part.0").write_bytes(CONTENT[:1000])
+        self.part.with_name("yt-dlp.part.2").write_bytes(CONTENT[2 * size:2 * size + size])
+        self.write_meta()
+        sha256 = manager._download_file(self.url, self.dest, "yt-dlp", self.sha256)
+        self.assertEqual(sha256, self.sha256)
+        self.assertEqual(self.dest.read_bytes(), CONTENT)
+        ranges = sorted(r for r, _ in self.gets())
+        self.assertEqual(ranges, sorted([
+            f"bytes=1000-{size - 1}", f"bytes={size}-{2 * size - 1}", f"bytes={3 * size}-{len(CONTENT) - 1}"
+        ]))
+        self.assertEqual(list(self.dest.parent.glob("yt-dlp.part*")), [])
+
+    def test_changed_validator_drops_partial(self):
+        manager = self.manager()
+        self.part.write_bytes(b"stale" * 1000)
+        self.write_meta('"old"')
+        manager._download_file(self.url, self.dest, "yt-dlp", self.sha256)
+        self.assertEqual(self.dest.read_bytes(), CONTENT)
+        self.assertEqual(self.gets(), [(None, None)])
+
+    def test_if_range_mismatch_restarts_from_zero(self):
+        manager = self.manager()
+        self.part.write_bytes(b"stale" * 1000)
+        self.write_meta()
+        self.httpd.head_etag = ETAG
+        self.httpd.etag = '"v2"'
+        sha256 = manager._download_file(self.url, self.dest, "yt-dlp", self.sha256)
+        self.assertEqual(sha256, self.sha256)
+        self.assertEqual(self.dest.read_bytes(), CONTENT)
+        self.assertEqual(self.gets(), [("bytes=5000-", ETAG)])
+
+    def test_complete_part_answered_with_416(self):
+        manager = self.manager()
+        self.part.write_bytes(CONTENT)
+        self.write_meta()
+        sha256 = manager._download_file(self.url, self.dest, "yt-dlp", self.sha256)
+        self.assertEqual(sha256, self.sha256)
+        self.assertEqual(self.dest.read_bytes(), CONTENT)
+        self.assertEqual(self.gets(), [(f"bytes={len(CONTENT)}-", ETAG)])
+
+
+def ffmpeg_zip(tag):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        for name in ("ffmpeg", "ffprobe", "ffplay"):
+            z.writestr(f"ffmpeg-{tag}-essentials_build/bin/{name}", f"{name} {tag}")
+    return buffer.getvalue()
+
+
+class InstallFfmpegTest(LocalServerTest):
+    def setUp(self):
+        super().setUp()
+        self.bundle = ffmpeg_zip("v2")
+        self.httpd.files = {"/ffmpeg-essentials_build.zip": self.bundle}
+        self.req = self.dir / "req"
+        self.req.mkdir()
+        for name in ("ffmpeg", "ffprobe", "ffplay"):
+            (self.req / name).write_text(f"{name} v1")
+        self.outcomes = []
+        self.errors = []
+
+    def release(self, sha256=None):
+        base = self.url.rsplit("/", 1)[0]
+        assets = [{"name": "ffmpeg-essentials_build.zip", "browser_download_url": f"{base}/ffmpeg-essentials_build.zip"}]
+        if sha256:
+            self.httpd.files["/SHA256SUMS"] = f"{sha256}  ffmpeg-essentials_build.zip\n".encode()
+            assets.append({"name": "SHA256SUMS", "browser_download_url": f"{base}/SHA256SUMS"})
+        return {"tag_name": "v2", "published_at": "2026-01-01T00:00:00Z", "assets": assets}
+
+    def install(self, release):
+        manager = self.manager()
+        manager._is_online = lambda: True
+        manager._github_latest_release = lambda repo: release
+        manager.signals.finished.connect(lambda *args: self.outcomes.append(args))
+        manager.signals.error.connect(self.errors.append)
+        manager._install_thread("ffmpeg", None, None, None)
+        return manager
+
+    def binaries(self):
+        return sorted(p.name for p in self.req.iterdir() if p.name.startswith("ff"))
+
+    def test_checksum_mismatch_keeps_previous_binaries(self):
+        self.install(self.release("0" * 64))
+        self.assertEqual(self.outcomes, [])
+        self.assertEqual(self.errors, ["Error: ffmpeg failed checksum verification, the previous version was kept."])
+        for name in ("ffmpeg", "ffprobe", "ffplay"):
+            self.assertEqual((self.req / name).read_text(), f"{name} v1")
+        self.assertEqual(self.binaries(), ["ffmpeg", "ffplay", "ffprobe"])
+
+    def test_verified_install(self):
+        self.install(self.release(hashlib.sha256(self.bundle).hexdigest()))
+        self.assertEqual(self.outcomes, [("ffmpeg", True, "downloaded")])
+        self.assertEqual((self.req / "ffmpeg").read_text(), "ffmpeg v2")
+        self.assertEqual(self.binaries(), ["ffmpeg", "ffplay", "ffprobe"])
+
+    def test_install_without_checksum_is_reported(self):
+        self.install(self.release())
+        self.assertEqual(len(self.outcomes), 1)
+        self.assertIn("without checksum verification", self.outcomes[0][2])
+        self.assertEqual((self.req / "ffmpeg").read_text(), "ffmpeg v2")
+
+    def test_failed_swap_rolls_back_every_file(self):
+        (self.req / "ffprobe").unlink()
+        bundle = self.req / "ffmpeg_download.zip"
+        bundle.write_bytes(self.bundle)
+        replace = os.replace
+
+        def failing_replace(src, dst):
+            if Path(src).name == "ffplay.new":
+                raise OSError("disk full")
+            return replace(src, dst)
+
+        with mock.patch("resources.reqdownloader.os.replace", side_effect=failing_replace):
+            with self.assertRaises(OSError):
+                self.manager()._extract_and_copy_ffmpeg(bundle)
+        self.assertEqual((self.req / "ffmpeg").read_text(), "ffmpeg v1")
+        self.assertEqual((self.req / "ffplay").read_text(), "ffplay v1")
+        self.assertEqual(self.binaries(), ["ffmpeg", "ffmpeg_download.zip", "ffplay"])
+
+
+if __name__ == "__main__":
+    unittest.main()
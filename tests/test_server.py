@@ -0,0 +1,173 @@
+import http.client
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from benchmarks import pipeline as bench
+from resources.connectivity import connectivity
+from resources.core import DownloadCore
+from resources.metrics import MetricsRegistry
+from resources.server import JobService
+
+TOKEN = "secret"
+MEDIA = {"size": 256 * 1024, "segments": 4, "segment_size": 64 * 1024, "rate": 0, "dependency_size": 1024}
+
+
+class JobApiTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.media, cls.base = bench.start_server(dict(MEDIA))
+        cls.urls = connectivity.urls
+        connectivity.urls = (cls.base,)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.tools = Path(cls.tmp.name) / "tools"
+        cls.tools.mkdir()
+        bench.make_tools(cls.tools)
+
+    @classmethod
+    def tearDownClass(cls):
+        connectivity.urls = cls.urls
+        cls.media.shutdown()
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.media.config["rate"] = 0
+        self.output = Path(tempfile.mkdtemp(dir=self.tmp.name))
+        self.core = DownloadCore(
+            yt_dlp_path=self.tools / "yt-dlp", ffmpeg_dir=self.tools, metrics=MetricsRegistry()
+        )
+        self.service = JobService(self.core, default_path=str(self.output), token=TOKEN)
+        self.httpd = self.service.bind("127.0.0.1", 0)
+        threading.Thread(target=self.service.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.service.shutdown()
+        self.core.shutdown()
+
+    def request(self, method, path, body=None, token=TOKEN, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=30)
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if body is not None:
+            headers.setdefault("Content-Type", "application/json")
+            body = body if isinstance(body, (str, bytes)) else json.dumps(body)
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        conn.close()
+        if response.getheader("Content-Type", "").startswith("application/json"):
+            data = json.loads(data)
+        return response.status, data
+
+    def wait_for(self, job_id, states=("Done", "Failed", "Cancelled"), timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status, job = self.request("GET", f"/jobs/{job_id}")
+            if job["state"] in states:
+                return job
+            time.sleep(0.1)
+        self.fail(f"job {job_id} did not reach {states}")
+
+    def test_post_get_and_finish(self):
+        status, data = self.request("POST", "/jobs", {"url": f"{self.base}/media/clip1.mp4", "title": "Clip"})
+        self.assertEqual(status, 201)
+        self.assertEqual(data["rejected"], [])
+        job_id = data["accepted"][0]["id"]
+        job = self.wait_for(job_id)
+        self.assertEqual(job["state"], "Done", job["message"])
+        self.assertEqual(job["title"], "Clip")
+        self.assertEqual(job["metrics"]["exit_code"], 0)
+        self.assertEqual([p.name for p in self.output.iterdir()], ["Clip clip1 [clip1].mp4"])
+        status, jobs = self.request("GET", "/jobs")
+        self.assertEqual(status, 200)
+        self.assertEqual([j["id"] for j in jobs], [job_id])
+        status, _ = self.request("GET", "/jobs/999")
+        self.assertEqual(status, 404)
+
+    def test_delete_cancels_running_job(self):
+        self.media.config["rate"] = 16 * 1024
+        status, data = self.request("POST", "/jobs", {"url": f"{self.base}/media/clip2.mp4"})
+        self.assertEqual(status, 201)
+        job_id = data["accepted"][0]["id"]
+        self.wait_for(job_id, states=("Running",))
+        status, _ = self.request("DELETE", f"/jobs/{job_id}")
+        self.assertEqual(status, 200)
+        self.assertEqual(self.wait_for(job_id)["state"], "Cancelled")
+        status, _ = self.request("DELETE", "/jobs/999")
+        self.assertEqual(status, 404)
+
+    def test_token_is_required(self):
+        self.assertEqual(self.request("GET", "/jobs", token=None)[0], 401)
+        self.assertEqual(self.request("GET", "/jobs", token="wrong")[0], 401)
+        status, _ = self.request("POST", "/jobs", {"url": f"{self.base}/media/clip3.mp4"}, token=None)
+        self.assertEqual(status, 401)
+        self.assertEqual(self.core.queue.jobs(), [])
+
+    def test_generated_token(self):
+        service = JobService(self.core)
+        self.assertTrue(service.token)
+        self.assertNotEqual(service.token, JobService(self.core).token)
+
+    def test_cross_origin_and_plain_text_are_refused(self):
+        body = {"url": f"{self.base}/media/clip4.mp4"}
+        status, _ = self.request("POST", "/jobs", body, headers={"Origin": "https://evil.example"})
+        self.assertEqual(status, 403)
+        status, _ = self.request("POST", "/jobs", body, headers={"Content-Type": "text/plain"})
+        self.assertEqual(status, 415)
+        self.assertEqual(self.core.queue.jobs(), [])
+
+    def test_rejected_payloads(self):
+        url = f"{self.base}/media/clip5.mp4"
+        payloads = [
+            {"url": url, "priority": "high"},
+            {"url": url, "sections": 5},
+            {"url": url, "audio_format": ["mp3"]},
+            {"url": url, "audio_only": "yes"},
+            {"url": 5},
+            {"url": "not a url"},
+            {"url": url, "custom_arg": "--exec id"},
+            {"url": url, "download_path": "/"},
+            {"url": url, "download_path": "../escape"},
+            42,
+        ]
+        status, data = self.request("POST", "/jobs", payloads)
+        self.assertEqual(status, 400)
+        self.assertEqual(data["accepted"], [])
+        self.assertEqual(len(data["rejected"]), len(payloads))
+        self.assertEqual(self.request("POST", "/jobs", "{not json")[0], 400)
+        self.assertEqual(self.request("GET", "/jobs")[1], [])
+
+    def test_relative_download_path_stays_in_output(self):
+        status, data = self.request("POST", "/jobs", {"url": f"{self.base}/hls/clip6/index.m3u8", "download_path": "sub"})
+        self.assertEqual(status, 201)
+        job = self.wait_for(data["accepted"][0]["id"])
+        self.assertEqual(job["state"], "Done", job["message"])
+        self.assertEqual([p.name for p in (self.output / "sub").iterdir()], ["Clip clip6 [clip6].mp4"])
+
+    def test_dependencies(self):
+        status, data = self.request("GET", "/dependencies")
+        self.assertEqual(status, 200)
+        self.assertEqual(data, {"ffmpeg": True, "yt-dlp": True})
+        self.core.yt_dlp_path = self.tools / "missing"
+        self.assertEqual(self.request("GET", "/dependencies")[1], {"ffmpeg": True, "yt-dlp": False})
+        self.assertEqual(sorted(p.name for p in self.tools.iterdir()), ["ffmpeg", "ffprobe", "yt-dlp"])
+
+    def test_priority_patch(self):
+        self.media.config["rate"] = 16 * 1024
+        self.core.set_workers(1)
+        first = self.request("POST", "/jobs", {"url": f"{self.base}/media/clip7.mp4"})[1]["accepted"][0]["id"]
+        second = self.request("POST", "/jobs", {"url": f"{self.base}/media/clip8.mp4"})[1]["accepted"][0]["id"]
+        self.assertEqual(self.request("PATCH", f"/jobs/{second}", {"priority": "x"})[0], 400)
+        status, job = self.request("PATCH", f"/jobs/{second}", {"priority": 5})
+        self.assertEqual(status, 200)
+        self.assertEqual(job["priority"], 5)
+        for job_id in (first, second):
+            self.request("DELETE", f"/jobs/{job_id}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import queue
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from resources.core import DownloadCore
+from resources.jobspec import JobSpec
+from resources.metrics import MetricsRegistry
+from resources.probe import ProbeCache
+from resources.ytdlp_engine import IN_PROCESS, _run_download
+
+URL = "https://example.com/watch/v1"
+
+
+class FakeYoutubeDL:
+    calls = []
+
+    def __init__(self, params):
+        self.params = params
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def download(self, urls):
+        self.calls.append(("download", list(urls)))
+        return 0 if urls else 1
+
+    def download_with_info_file(self, info_filename):
+        self.calls.append(("download_with_info_file", info_filename))
+        return 0
+
+
+def fake_yt_dlp():
+    def parse_options(argv):
+        load_info = argv[argv.index("--load-info-json") + 1] if "--load-info-json" in argv else None
+        urls = [arg for arg in argv if arg.startswith("https://")]
+        return types.SimpleNamespace(
+            ydl_opts={}, urls=urls, options=types.SimpleNamespace(load_info_filename=load_info)
+        )
+
+    class DownloadError(Exception):
+        pass
+
+    class DownloadCancelled(Exception):
+        pass
+
+    utils = types.ModuleType("yt_dlp.utils")
+    utils.DownloadError = DownloadError
+    utils.DownloadCancelled = DownloadCancelled
+    utils.expand_path = lambda path: path
+    module = types.ModuleType("yt_dlp")
+    module.YoutubeDL = FakeYoutubeDL
+    module.parse_options = parse_options
+    module.utils = utils
+    return {"yt_dlp": module, "yt_dlp.utils": utils}
+
+
+class RunDownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.cache = ProbeCache(self.dir / "probe")
+        self.core = DownloadCore(
+            yt_dlp_path=self.dir / "yt-dlp", ffmpeg_dir=self.dir, probe_cache=self.cache, metrics=MetricsRegistry()
+        )
+        self.spec = JobSpec.from_options(URL, str(self.dir / "out"), {"engine": IN_PROCESS})
+        FakeYoutubeDL.calls = []
+
+    def tearDown(self):
+        self.core.shutdown()
+        self.tmp.cleanup()
+
+    def run_download(self, argv):
+        with mock.patch.dict(sys.modules, fake_yt_dlp()):
+            return _run_download(1, argv, queue.Queue(), {}, {})
+
+    def test_downloads_url_without_probe(self):
+        argv = self.core.command_for(self.spec)[1:]
+        self.assertEqual(self.run_download(argv), 0)
+        self.assertEqual(FakeYoutubeDL.calls, [("download", [URL])])
+
+    def test_downloads_probed_info_file(self):
+        self.cache.put(URL, {"id": "v1", "extractor_key": "Generic", "formats": []}, self.spec.cookies)
+        info_path = str(self.cache.info_path(URL, self.spec.cookies))
+        argv = self.core.command_for(self.spec)[1:]
+        self.assertIn("--load-info-json", argv)
+        self.assertNotIn(URL, argv)
+        self.assertEqual(json.loads(Path(info_path).read_text())["id"], "v1")
+        self.assertEqual(self.run_download(argv), 0)
+        self.assertEqual(FakeYoutubeDL.calls, [("download_with_info_file", info_path)])
+
+
+if __name__ == "__main__":
+    unittest.main()